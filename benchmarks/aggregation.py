@@ -0,0 +1,94 @@
+"""Micro-benchmark of the vectorized time-series aggregation.
+
+Synthetic series of 10k to 10M rows are aggregated per date (and per
+label/date) with every supported aggregation. The previous row-at-a-time
+dict-of-lists mean is timed as a baseline for the smaller sizes.
+
+Usage:
+    python -m benchmarks.aggregation --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from snowflake_cybersyn_demo.timeseries import (
+    AGGREGATIONS,
+    TimeSeries,
+    aggregate,
+)
+
+
+def _synthetic_series(n: int, n_labels: int, seed: int = 0) -> TimeSeries:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2015-01-01")
+    return TimeSeries(
+        dates=start + rng.integers(0, 3_000, size=n).astype("timedelta64[D]"),
+        labels=np.array([f"variable {ix}" for ix in range(n_labels)])[
+            rng.integers(0, n_labels, size=n)
+        ],
+        values=rng.random(n) * 100,
+    )
+
+
+def _legacy_mean(timeseries: TimeSeries) -> List[Dict[str, float]]:
+    # the previous implementation, fed from records instead of JSON text
+    new_time_series_data: Dict[str, List[float]] = {}
+    for el in timeseries.to_records():
+        date = el["date"]
+        value = el["value"]
+        if date in new_time_series_data:
+            new_time_series_data[date].append(float(value))
+        else:
+            new_time_series_data[date] = [float(value)]
+    return [
+        {"date": date, "value": sum(values) / len(values)}
+        for date, values in new_time_series_data.items()
+    ]
+
+
+def _best_of(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000, 10_000_000],
+    )
+    parser.add_argument("--labels", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-legacy-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'aggregation':<16} {'by date':>10} {'by label':>10}")
+    for n in args.sizes:
+        timeseries = _synthetic_series(n, args.labels)
+        if n <= args.max_legacy_rows:
+            legacy_ms = _best_of(lambda: _legacy_mean(timeseries), 1)
+            print(f"{n:>10} {'legacy mean':<16} {legacy_ms:>8.1f}ms")
+        for how in AGGREGATIONS:
+            by_date_ms = _best_of(
+                lambda: aggregate(timeseries, how=how), args.repeat
+            )
+            by_label_ms = _best_of(
+                lambda: aggregate(timeseries, how=how, by_label=True),
+                args.repeat,
+            )
+            print(
+                f"{n:>10} {how:<16} {by_date_ms:>8.1f}ms {by_label_ms:>8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
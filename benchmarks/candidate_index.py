@@ -0,0 +1,88 @@
+"""Compare `PrefixIndex` lookups with a SQL prefix query round trip.
+
+A file-backed SQLite table of product names stands in for the Cybersyn price
+attributes table. The SQL side uses a pooled connection, so the comparison
+isolates query execution (plus an optional simulated network round trip) from
+login cost.
+
+Usage:
+    python -m benchmarks.candidate_index --products 5000 --lookups 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from sqlalchemy import create_engine, text
+
+from snowflake_cybersyn_demo.workflows._index import PrefixIndex
+
+QUERY = "SELECT DISTINCT product FROM prices WHERE product LIKE :prefix"
+
+
+def _time_calls(fn: Callable[[str], List[str]], prefixes: List[str]) -> float:
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        fn(prefix)
+        timings.append(time.perf_counter() - start)
+    return statistics.mean(timings) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    parser.add_argument("--round-trip-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = ["eggs", "gasoline", "milk", "bread", "coffee", "rice", "beef"]
+    products = [
+        f"{rng.choice(words)} {rng.choice(words)} {ix}"
+        for ix in range(args.products)
+    ]
+    prefixes = [
+        rng.choice(products)[: rng.randint(2, 8)] for _ in range(args.lookups)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'b.db')}")
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE prices (product TEXT)"))
+            connection.execute(
+                text("INSERT INTO prices VALUES (:product)"),
+                [{"product": product} for product in products],
+            )
+
+        def sql_lookup(prefix: str) -> List[str]:
+            time.sleep(args.round_trip_ms / 1000)
+            with engine.connect() as connection:
+                rows = connection.execute(
+                    text(QUERY), {"prefix": f"{prefix}%"}
+                ).fetchall()
+            return [str(row[0]) for row in rows]
+
+        start = time.perf_counter()
+        index = PrefixIndex(products)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # sanity check: both paths agree
+        for prefix in prefixes[:50]:
+            assert sorted(sql_lookup(prefix)) == sorted(index.search(prefix))
+
+        print(
+            f"{args.products} products, {args.lookups} lookups "
+            f"(index built in {build_ms:.1f}ms)"
+        )
+        print(f"index  mean={_time_calls(index.search, prefixes):10.2f}us")
+        print(f"sql    mean={_time_calls(sql_lookup, prefixes):10.2f}us")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
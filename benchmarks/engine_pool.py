@@ -0,0 +1,124 @@
+"""Compare per-call engines with pooled engines from an `EngineRegistry`.
+
+A file-backed SQLite database stands in for Snowflake. Snowflake logins are
+expensive (TLS handshake + authentication), so a configurable delay is added
+to every new DBAPI connection to mimic that cost.
+
+Usage:
+    python -m benchmarks.engine_pool --queries 200 --connect-latency-ms 50
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, List
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from snowflake_cybersyn_demo.workflows._engines import (
+    EnginePoolConfig,
+    EngineRegistry,
+)
+
+QUERY = "SELECT DISTINCT product FROM prices WHERE product LIKE :prefix"
+
+
+def _setup_database(path: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE prices (product TEXT, date TEXT, value REAL)")
+        )
+        connection.execute(
+            text("INSERT INTO prices VALUES (:product, :date, :value)"),
+            [
+                {
+                    "product": f"good {ix % 50}",
+                    "date": "2021-01-01",
+                    "value": ix,
+                }
+                for ix in range(1_000)
+            ],
+        )
+    engine.dispose()
+
+
+def _make_engine_factory(
+    path: str, connect_latency: float
+) -> Callable[[str, EnginePoolConfig], Engine]:
+    def _factory(database: str, config: EnginePoolConfig) -> Engine:
+        del database
+        engine = create_engine(f"sqlite:///{path}", **config.engine_kwargs())
+
+        @event.listens_for(engine, "connect")
+        def _simulate_login(*args: Any) -> None:
+            time.sleep(connect_latency)
+
+        return engine
+
+    return _factory
+
+
+def _run_query(engine: Engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text(QUERY), {"prefix": "good 1%"}).fetchall()
+
+
+def _time_calls(fn: Callable[[], None], n: int) -> List[float]:
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(name: str, timings: List[float]) -> None:
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[int(0.95 * (len(timings_ms) - 1))]
+    print(
+        f"{name:<10} total={sum(timings_ms):9.1f}ms "
+        f"mean={statistics.mean(timings_ms):7.2f}ms "
+        f"p50={statistics.median(timings_ms):7.2f}ms p95={p95:7.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--connect-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "bench.db")
+        _setup_database(path)
+        factory = _make_engine_factory(path, args.connect_latency_ms / 1000)
+        config = EnginePoolConfig()
+
+        def per_call() -> None:
+            # mirrors the previous behaviour: a brand new engine every query
+            engine = factory("FINANCIAL__ECONOMIC_ESSENTIALS", config)
+            try:
+                _run_query(engine)
+            finally:
+                engine.dispose()
+
+        registry = EngineRegistry(engine_factory=factory, config=config)
+
+        def pooled() -> None:
+            _run_query(registry.get_engine("FINANCIAL__ECONOMIC_ESSENTIALS"))
+
+        print(
+            f"{args.queries} queries, "
+            f"simulated login latency {args.connect_latency_ms}ms"
+        )
+        _report("per-call", _time_calls(per_call, args.queries))
+        _report("pooled", _time_calls(pooled, args.queries))
+        registry.dispose()
+
+
+if __name__ == "__main__":
+    main()
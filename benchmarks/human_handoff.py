@@ -0,0 +1,117 @@
+"""Compare 100 ms polling with the `ResponseRegistry` for human input.
+
+Hundreds of tasks wait for human input on an event loop thread while
+another thread (standing in for the Streamlit frontend) answers them one at
+a time, in random order. Each answer carries its task id and the time it
+was sent, so the waiter can report its wake-up latency and whether it got
+its own answer. CPU time is the process time used over the whole run.
+
+Usage:
+    python -m benchmarks.human_handoff --waiters 500 --answer-interval-ms 5
+"""
+
+import argparse
+import asyncio
+import queue
+import random
+import statistics
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Tuple
+
+from snowflake_cybersyn_demo.workflows._handoff import ResponseRegistry
+
+Put = Callable[[str, str], Any]
+Get = Callable[[str], Awaitable[str]]
+
+
+def _polling_channel() -> Tuple[Put, Get]:
+    results: queue.Queue[str] = queue.Queue()
+
+    def _put(task_id: str, value: str) -> None:
+        results.put(value)
+
+    # the previous `_poll_for_human_input_result`, which ignores the task id
+    async def _get(task_id: str) -> str:
+        human_input = None
+        while human_input is None:
+            try:
+                human_input = results.get_nowait()
+            except queue.Empty:
+                human_input = None
+            await asyncio.sleep(0.1)
+        return human_input
+
+    return _put, _get
+
+
+def _registry_channel() -> Tuple[Put, Get]:
+    responses: ResponseRegistry[str] = ResponseRegistry()
+    return responses.resolve, responses.wait
+
+
+def _run(
+    put: Put, get: Get, n_waiters: int, answer_interval: float
+) -> Tuple[List[float], int, float, float]:
+    latencies: List[float] = []
+    misrouted = 0
+    ready = threading.Event()
+    task_ids = [f"task-{ix}" for ix in range(n_waiters)]
+
+    async def _waiter(task_id: str) -> None:
+        nonlocal misrouted
+        answered_task_id, sent_at = (await get(task_id)).split(",")
+        latencies.append(time.perf_counter() - float(sent_at))
+        misrouted += answered_task_id != task_id
+
+    async def _main() -> None:
+        tasks = [asyncio.create_task(_waiter(t)) for t in task_ids]
+        await asyncio.sleep(0.2)  # let every waiter start waiting
+        ready.set()
+        await asyncio.gather(*tasks)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    loop_thread = threading.Thread(target=asyncio.run, args=(_main(),))
+    loop_thread.start()
+    ready.wait()
+    for task_id in random.Random(0).sample(task_ids, n_waiters):
+        time.sleep(answer_interval)
+        put(task_id, f"{task_id},{time.perf_counter()!r}")
+    loop_thread.join()
+    return (
+        latencies,
+        misrouted,
+        time.process_time() - cpu_start,
+        time.perf_counter() - wall_start,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--waiters", type=int, default=500)
+    parser.add_argument("--answer-interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'channel':<9} {'p50 latency':>12} {'p99 latency':>12} "
+        f"{'misrouted':>10} {'cpu':>8} {'wall':>8}"
+    )
+    for name, channel in (
+        ("polling", _polling_channel),
+        ("registry", _registry_channel),
+    ):
+        put, get = channel()
+        latencies, misrouted, cpu, wall = _run(
+            put, get, args.waiters, args.answer_interval_ms / 1000
+        )
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{name:<9} {quantiles[49] * 1000:>10.2f}ms "
+            f"{quantiles[98] * 1000:>10.2f}ms {misrouted:>10} "
+            f"{cpu:>7.2f}s {wall:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
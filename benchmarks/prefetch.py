@@ -0,0 +1,88 @@
+"""Measure speculative prefetch of time series while a human decides.
+
+Each session offers a list of candidates, waits for a simulated human and
+then fetches the selected candidate's time series. Candidates are listed
+from the likeliest selection down, as the workflows rank them, and the human
+picks one of the first with the given probabilities, or any other one.
+Queries are simulated with a fixed latency, so the wait after answering is
+the part of the query the human did not spend deciding.
+
+Usage:
+    python -m benchmarks.prefetch --sessions 200 --query-ms 800 --think-ms 400
+"""
+
+import argparse
+import asyncio
+import functools
+import random
+import statistics
+import time
+from typing import List
+
+from snowflake_cybersyn_demo.workflows._prefetch import SpeculativePrefetcher
+
+
+async def _session(
+    args: argparse.Namespace,
+    rng: random.Random,
+    prefetcher: SpeculativePrefetcher[str],
+) -> float:
+    names = [f"good {rng.random():.6f}" for _ in range(args.candidates)]
+    weights = [float(w) for w in args.pick_weights.split(",")]
+    others = len(names) - len(weights)
+    rest = max(0.0, 1.0 - sum(weights)) / others
+    ix = rng.choices(range(len(names)), weights=weights + [rest] * others)[0]
+    selected = names[ix]
+
+    async def _query(name: str) -> str:
+        await asyncio.sleep(args.query_ms / 1000)
+        return name
+
+    prefetched = prefetcher.prefetch(
+        {name: functools.partial(_query, name) for name in names}
+    )
+    await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+    prefetcher.settle(prefetched, selected)
+
+    start = time.perf_counter()
+    result = await prefetcher.get(selected)
+    if result is None:
+        result = await _query(selected)
+    return time.perf_counter() - start
+
+
+async def _run(args: argparse.Namespace) -> None:
+    for enabled in (False, True):
+        rng = random.Random(0)
+        prefetcher: SpeculativePrefetcher[str] = SpeculativePrefetcher(
+            enabled=enabled, top_k=args.top_k
+        )
+        latencies: List[float] = []
+        for _ in range(args.sessions):
+            latencies.append(await _session(args, rng, prefetcher))
+        stats = prefetcher.stats
+        p50 = statistics.median(latencies) * 1000
+        mean = statistics.mean(latencies) * 1000
+        print(
+            f"prefetch {'on ' if enabled else 'off'}: "
+            f"p50 {p50:.0f}ms, mean {mean:.0f}ms after answering, "
+            f"hit rate {stats.hit_rate:.1%}, "
+            f"{stats.started} queries started, {stats.wasted} wasted"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=3)
+    # chance the human picks each of the first candidates
+    parser.add_argument("--pick-weights", default="0.4,0.2,0.1")
+    parser.add_argument("--query-ms", type=float, default=800.0)
+    parser.add_argument("--think-ms", type=float, default=400.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Check that pushed-down and client-side aggregation agree, and time both.
+
+The client-side path streams the raw rows in chunks of `--chunk-size`.
+
+The Cybersyn tables are recreated in a SQLite file attached as the
+`cybersyn` schema. SQLite lacks a few Snowflake features used by the
+queries, so the stand-in registers `DATE_TRUNC` and `MEDIAN` functions and
+rewrites `ILIKE` to SQLite's (case-insensitive) `LIKE`.
+
+Usage:
+    python -m benchmarks.pushdown_parity --rows 200000
+"""
+
+import argparse
+import datetime
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+# the query helpers read Snowflake credentials at import time
+for var in ("USERNAME", "PASSWORD", "ACCOUNT", "ROLE"):
+    os.environ.setdefault(f"SNOWFLAKE_{var}", "unused")
+
+import snowflake_cybersyn_demo.workflows._db as db  # noqa: E402
+from snowflake_cybersyn_demo.timeseries import (  # noqa: E402
+    AGGREGATIONS,
+    TimeSeries,
+)
+from snowflake_cybersyn_demo.workflows._engines import (  # noqa: E402
+    EnginePoolConfig,
+    EngineRegistry,
+)
+
+
+class _Median:
+    def __init__(self) -> None:
+        self.values: List[float] = []
+
+    def step(self, value: Optional[float]) -> None:
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self) -> Optional[float]:
+        return statistics.median(self.values) if self.values else None
+
+
+def _date_trunc(freq: str, date: str) -> str:
+    day = datetime.date.fromisoformat(date)
+    if freq == "week":
+        day -= datetime.timedelta(days=day.weekday())
+    elif freq == "month":
+        day = day.replace(day=1)
+    elif freq == "year":
+        day = day.replace(month=1, day=1)
+    return day.isoformat()
+
+
+def populate(path: str, n_rows: int) -> None:
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE bureau_of_labor_statistics_price_timeseries
+            (variable TEXT, date TEXT, value REAL);
+        CREATE TABLE bureau_of_labor_statistics_price_attributes
+            (variable TEXT, variable_name TEXT, product TEXT, report TEXT);
+        CREATE TABLE datacommons_timeseries
+            (geo_id TEXT, variable_name TEXT, date TEXT, value REAL);
+        CREATE TABLE geography_index (geo_id TEXT, geo_name TEXT, level TEXT);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO bureau_of_labor_statistics_price_attributes "
+        "VALUES (?, ?, ?, 'Average Price')",
+        [
+            (f"v{ix}", f"Average Price: Eggs, grade {ix}", f"Eggs {ix}")
+            for ix in range(5)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO geography_index VALUES (?, ?, 'City')",
+        [("geo/1", "New York"), ("geo/2", "Chicago")],
+    )
+    start = datetime.date(2015, 1, 1)
+
+    def _date() -> str:
+        return (start + datetime.timedelta(rng.randint(0, 3000))).isoformat()
+
+    conn.executemany(
+        "INSERT INTO bureau_of_labor_statistics_price_timeseries "
+        "VALUES (?, ?, ?)",
+        [
+            (f"v{rng.randint(0, 4)}", _date(), rng.random())
+            for _ in range(n_rows)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO datacommons_timeseries VALUES (?, ?, ?, ?)",
+        [
+            (
+                rng.choice(["geo/1", "geo/2"]),
+                f"Count_Person_{rng.choice(['Male', 'Female', 'Total'])}",
+                _date(),
+                rng.random() * 1000,
+            )
+            for _ in range(n_rows)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def make_engine_factory(path: str) -> Any:
+    def _factory(database: str, config: EnginePoolConfig) -> Engine:
+        del database
+        main_path = os.path.join(os.path.dirname(path), "main.db")
+        engine = create_engine(
+            f"sqlite:///{main_path}", **config.engine_kwargs()
+        )
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection: Any, *args: Any) -> None:
+            dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS cybersyn")
+            dbapi_connection.create_function("DATE_TRUNC", 2, _date_trunc)
+            dbapi_connection.create_aggregate("MEDIAN", 1, _Median)
+
+        @event.listens_for(engine, "before_cursor_execute", retval=True)
+        def _rewrite_ilike(
+            conn: Any, cursor: Any, statement: str, parameters: Any, *args: Any
+        ) -> Tuple[str, Any]:
+            return statement.replace(" ILIKE ", " LIKE "), parameters
+
+        return engine
+
+    return _factory
+
+
+def same_series(left: TimeSeries, right: TimeSeries) -> bool:
+    """Compare two series, labels included, regardless of row order."""
+
+    def _canonical(timeseries: TimeSeries) -> Tuple[np.ndarray, ...]:
+        labels = timeseries.labels.astype(str)
+        order = np.lexsort((timeseries.dates, labels))
+        return labels[order], timeseries.dates[order], timeseries.values[order]
+
+    left_labels, left_dates, left_values = _canonical(left)
+    right_labels, right_dates, right_values = _canonical(right)
+    return (
+        np.array_equal(left_labels, right_labels)
+        and np.array_equal(left_dates, right_dates)
+        and np.allclose(left_values, right_values)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    # small chunks make the client path merge many partial aggregates
+    parser.add_argument("--chunk-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cybersyn.db")
+        populate(path, args.rows)
+        db.engine_registry = EngineRegistry(
+            engine_factory=make_engine_factory(path)
+        )
+        db.fetch_chunk_size = args.chunk_size
+
+        fetchers = {
+            "good": lambda **kwargs: db.get_aggregated_time_series_of_good(
+                "eggs", **kwargs
+            ),
+            "city stat": lambda **kwargs: (
+                db.get_aggregated_time_series_of_statistic_variable(
+                    "New York", "count_person", **kwargs
+                )
+            ),
+        }
+
+        failures = 0
+        print(
+            f"{'series':<10} {'agg':<7} {'by label':<9} {'freq':<6} "
+            f"{'pushdown':>10} {'client':>10}  result"
+        )
+        for name, how, by_label, freq in itertools.product(
+            fetchers,
+            AGGREGATIONS,
+            (False, True),
+            (None, "week", "month", "year"),
+        ):
+            kwargs = dict(how=how, by_label=by_label, freq=freq)
+            start = time.perf_counter()
+            pushed = fetchers[name](pushdown=True, **kwargs)
+            pushdown_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            client = fetchers[name](pushdown=False, **kwargs)
+            client_ms = (time.perf_counter() - start) * 1000
+
+            ok = same_series(pushed, client)
+            failures += not ok
+            print(
+                f"{name:<10} {how:<7} {str(by_label):<9} {str(freq):<6} "
+                f"{pushdown_ms:>8.1f}ms {client_ms:>8.1f}ms  "
+                f"{'ok' if ok else 'MISMATCH'}"
+            )
+        db.engine_registry.dispose()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
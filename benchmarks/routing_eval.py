@@ -0,0 +1,101 @@
+"""Evaluate the rule-based pre-router on a labelled task corpus.
+
+Each line of the corpus is a JSON object with the `task` text and its
+`label`: "timeseries", "city_stats" or "general". Tasks the rules defer on
+would go to the LLM selector, so coverage is the share of tasks the rules
+route, precision is measured over routed tasks and recall over all tasks
+of a label.
+
+Usage:
+    python -m benchmarks.routing_eval --corpus benchmarks/data/routing_tasks.jsonl
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+from typing import List, Tuple
+
+from llama_index.core.tools.types import ToolMetadata
+
+from snowflake_cybersyn_demo.deployment.routing import (
+    CITY_STATS_PATTERNS,
+    GENERAL_PATTERNS,
+    TIMESERIES_PATTERNS,
+    RuleBasedPreRouter,
+)
+
+LABELS = ["timeseries", "city_stats", "general"]
+
+
+def _load(path: str) -> List[Tuple[str, str]]:
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["task"], row["label"]) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--corpus", default="benchmarks/data/routing_tasks.jsonl"
+    )
+    parser.add_argument("--min-score", type=int, default=2)
+    parser.add_argument("--min-margin", type=int, default=1)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    corpus = _load(args.corpus)
+    # the labels stand in for the pipeline descriptions
+    choices = [ToolMetadata(description=label) for label in LABELS]
+    pre_router = RuleBasedPreRouter(
+        rules={
+            "timeseries": TIMESERIES_PATTERNS,
+            "city_stats": CITY_STATS_PATTERNS,
+            "general": GENERAL_PATTERNS,
+        },
+        min_score=args.min_score,
+        min_margin=args.min_margin,
+    )
+
+    totals: Counter = Counter()
+    routed: Counter = Counter()
+    correct: Counter = Counter()
+    errors = []
+    start = time.perf_counter()
+    for task, label in corpus:
+        totals[label] += 1
+        result = pre_router(choices, task)
+        if result is None:
+            continue
+        predicted = LABELS[result.ind]
+        routed[predicted] += 1
+        if predicted == label:
+            correct[label] += 1
+        else:
+            errors.append((task, label, predicted))
+    latency = (time.perf_counter() - start) / len(corpus)
+
+    print(
+        f"{'label':<11} {'tasks':>6} {'routed':>7} {'precision':>10} "
+        f"{'recall':>7}"
+    )
+    for label in LABELS:
+        precision = correct[label] / routed[label] if routed[label] else 0.0
+        recall = correct[label] / totals[label] if totals[label] else 0.0
+        print(
+            f"{label:<11} {totals[label]:>6} {routed[label]:>7} "
+            f"{precision:>10.1%} {recall:>7.1%}"
+        )
+    n_routed = sum(routed.values())
+    print(
+        f"\ncoverage {n_routed / len(corpus):.1%}, "
+        f"precision {sum(correct.values()) / max(1, n_routed):.1%}, "
+        f"{latency * 1e6:.0f}us per task"
+    )
+    if args.show_errors:
+        for task, label, predicted in errors:
+            print(f"  {task!r}: {label} routed to {predicted}")
+
+
+if __name__ == "__main__":
+    main()
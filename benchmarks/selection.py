@@ -0,0 +1,126 @@
+"""Compare the local selection resolver with an LLM call per selection.
+
+Replies are generated against random candidate lists in the shapes humans
+type them: item numbers, copied lines, exact or re-cased names, names with
+typos, partial names, and replies only an LLM could make sense of. The LLM
+is simulated with a fixed latency and always answers correctly, so the
+accuracy column measures only the local matches.
+
+Usage:
+    python -m benchmarks.selection --selections 2000 --llm-latency-ms 1500
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+from snowflake_cybersyn_demo.workflows._selection import SelectionResolver
+
+_WORDS = [
+    "gasoline",
+    "regular",
+    "premium",
+    "diesel",
+    "eggs",
+    "grade",
+    "large",
+    "bread",
+    "white",
+    "wheat",
+    "milk",
+    "whole",
+    "fresh",
+    "coffee",
+    "ground",
+    "roast",
+    "per",
+    "gallon",
+    "dozen",
+    "pound",
+]
+
+
+def _candidates(rng: random.Random, n: int) -> List[str]:
+    names: Set[str] = set()
+    while len(names) < n:
+        words = rng.sample(_WORDS, rng.randint(2, 5))
+        names.add(", ".join(words).capitalize())
+    return sorted(names)
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    ix = rng.randrange(len(text))
+    return text[:ix] + rng.choice(string.ascii_lowercase) + text[ix + 1 :]
+
+
+_REPLIES: List[Tuple[str, Callable[[random.Random, List[str], int], str]]] = [
+    ("number", lambda rng, c, ix: str(ix + 1)),
+    ("copied line", lambda rng, c, ix: f"{ix + 1}. {c[ix]}"),
+    ("exact", lambda rng, c, ix: c[ix]),
+    ("re-cased", lambda rng, c, ix: c[ix].upper()),
+    ("typo", lambda rng, c, ix: _typo(rng, c[ix])),
+    ("free text", lambda rng, c, ix: "the one I asked about earlier"),
+]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    rng = random.Random(0)
+    resolver = SelectionResolver()
+    local_latencies: List[float] = []
+    task_latencies: List[float] = []
+    totals: Dict[str, int] = {name: 0 for name, _ in _REPLIES}
+    correct: Dict[str, List[bool]] = {name: [] for name, _ in _REPLIES}
+
+    for _ in range(args.selections):
+        candidates = _candidates(rng, rng.randint(5, args.max_candidates))
+        ix = rng.randrange(len(candidates))
+        kind, make_reply = rng.choice(_REPLIES)
+        reply = make_reply(rng, candidates, ix)
+        totals[kind] += 1
+        used_llm = False
+
+        async def _llm() -> str:
+            nonlocal used_llm
+            used_llm = True
+            return candidates[ix]
+
+        start = time.perf_counter()
+        selection = await resolver.aresolve(reply, candidates, _llm)
+        elapsed = time.perf_counter() - start
+        if used_llm:
+            elapsed += args.llm_latency_ms / 1000
+        else:
+            local_latencies.append(elapsed)
+            correct[kind].append(selection == candidates[ix])
+        task_latencies.append(elapsed)
+
+    print(f"{'reply':<12} {'local':>7} {'accuracy':>9}")
+    for kind, results in correct.items():
+        local = len(results) / totals[kind] if totals[kind] else 0.0
+        accuracy = f"{sum(results) / len(results):.1%}" if results else "-"
+        print(f"{kind:<12} {local:>7.1%} {accuracy:>9}")
+
+    p50 = statistics.median(local_latencies) * 1e6
+    mean = statistics.mean(task_latencies) * 1000
+    print(
+        f"\nfast path {resolver.stats.fast_path_ratio:.1%}, "
+        f"local p50 {p50:.0f}us, mean per selection {mean:.0f}ms "
+        f"(vs {args.llm_latency_ms:.0f}ms with an LLM call every time)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--selections", type=int, default=2_000)
+    parser.add_argument("--max-candidates", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=1_500.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure time-to-first-interaction of the frontend startup.
+
+Registration with the control plane and with RabbitMQ is simulated with
+random latencies on a `BackgroundRuntime`. Three ways of waiting for it are
+compared:
+
+- sleep: start registration in the background and sleep a fixed 5 s, as
+  `startup()` used to
+- sequential: register one phase after another and wait for readiness
+- concurrent: register all phases at once and wait for readiness, as
+  `startup()` does now
+
+Usage:
+    python -m benchmarks.startup --runs 20 --mean-latency-ms 50
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from snowflake_cybersyn_demo.frontend.runtime import (
+    BackgroundRuntime,
+    Readiness,
+)
+
+PHASES = ["control_plane", "human_consumer", "final_task_consumer"]
+
+
+def _start(
+    strategy: str, latencies: Dict[str, float], fixed_sleep: float
+) -> float:
+    runtime = BackgroundRuntime()
+    readiness = Readiness(PHASES)
+    runtime.start()
+
+    async def _register(name: str) -> None:
+        async with readiness.phase(name):
+            await asyncio.sleep(latencies[name])
+
+    async def _register_all() -> None:
+        for name in PHASES:
+            await _register(name)
+
+    start = time.perf_counter()
+    if strategy == "concurrent":
+        for name in PHASES:
+            runtime.spawn(_register(name), name=name)
+    else:
+        runtime.spawn(_register_all(), name="register")
+    if strategy == "sleep":
+        time.sleep(fixed_sleep)
+    else:
+        readiness.wait(timeout=30)
+    elapsed = time.perf_counter() - start
+    runtime.shutdown()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--mean-latency-ms", type=float, default=50.0)
+    parser.add_argument("--sleep", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    scenarios = [
+        {name: rng.expovariate(1000 / args.mean_latency_ms) for name in PHASES}
+        for _ in range(args.runs)
+    ]
+
+    print(f"{'strategy':<11} {'p50':>9} {'max':>9}")
+    for name in ("sleep", "sequential", "concurrent"):
+        # one run is enough to show the fixed sleep
+        runs = scenarios[:1] if name == "sleep" else scenarios
+        times: List[float] = [
+            _start(name, latencies, args.sleep) for latencies in runs
+        ]
+        print(
+            f"{name:<11} {statistics.median(times) * 1000:>7.0f}ms "
+            f"{max(times) * 1000:>7.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
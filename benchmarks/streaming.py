@@ -0,0 +1,67 @@
+"""Compare peak memory of buffered and streamed client-side aggregation.
+
+The buffered path fetches the whole raw series before aggregating; the
+streamed path feeds chunks of `--chunk-size` rows to a
+`StreamingAggregator`. Peak Python allocations are measured with
+`tracemalloc` against the SQLite stand-in from `pushdown_parity`.
+
+Usage:
+    python -m benchmarks.streaming --rows 1000000 --chunk-size 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+# also sets the placeholder Snowflake credentials needed to import `_db`
+from benchmarks.pushdown_parity import _make_engine_factory, _populate
+from snowflake_cybersyn_demo.timeseries import aggregate
+from snowflake_cybersyn_demo.workflows import _db as db
+from snowflake_cybersyn_demo.workflows._engines import EngineRegistry
+
+
+def _measure(fn: Callable[[], Any]) -> Tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--how", default="mean")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cybersyn.db")
+        _populate(path, args.rows)
+        db.engine_registry = EngineRegistry(
+            engine_factory=_make_engine_factory(path)
+        )
+        db.fetch_chunk_size = args.chunk_size
+
+        def _buffered() -> Any:
+            return aggregate(db.get_time_series_of_good("eggs"), how=args.how)
+
+        def _streamed() -> Any:
+            return db.get_aggregated_time_series_of_good(
+                "eggs", how=args.how, pushdown=False
+            )
+
+        print(f"{'path':<10} {'time':>10} {'peak memory':>12}")
+        for name, fn in (("buffered", _buffered), ("streamed", _streamed)):
+            elapsed_ms, peak_mb = _measure(fn)
+            print(f"{name:<10} {elapsed_ms:>8.1f}ms {peak_mb:>10.1f}MB")
+        db.engine_registry.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Model the Streamlit refresh loop to compare update strategies.
+
+A producer thread stands in for the `FinalTaskConsumer`, putting task
+results on a `TimestampedQueue` at random intervals. A session loop applies
+them with one of three strategies:
+
+- legacy: every 5 s, take one item and rebuild the task table
+- timer: every 5 s, drain a batch and rebuild the task table
+- signal: every 1 s, compare queue versions and only drain and rebuild the
+  task table when something arrived
+- backoff: like signal, but the interval doubles up to 16 s while nothing
+  arrives and drops back to 1 s on an update
+
+End-to-end latency is measured from put to the rebuilt table. Idle CPU is
+the process time used per second while no results arrive, and idle reruns
+counts the fragment reruns per minute in that time; each one is also a
+round trip to the browser in the real app, which the model leaves out.
+Intervals are
+multiplied by `--time-scale` to keep the run short; reported latencies are
+scaled back.
+
+Usage:
+    python -m benchmarks.ui_updates --results 100 --tasks 2000
+"""
+
+import argparse
+import queue
+import random
+import statistics
+import threading
+import time
+from typing import Callable, List
+
+import pandas as pd
+
+from snowflake_cybersyn_demo.queues import (
+    TimestampedQueue,
+    drain,
+    has_updates,
+    next_check_interval,
+)
+
+
+def _render(n_tasks: int) -> pd.DataFrame:
+    # what every task_df run used to do
+    ids = [f"task-{ix}" for ix in range(n_tasks)]
+    return pd.DataFrame(
+        {"task_id": ids, "input": ids, "status": ["completed"] * n_tasks}
+    )
+
+
+def _legacy(q: TimestampedQueue[float], n_tasks: int) -> List[float]:
+    try:
+        items = [q.get_nowait()]
+    except queue.Empty:
+        items = []
+    # three fragments rerun on every tick, one of them renders the table
+    _render(n_tasks)
+    return items
+
+
+def _timer(q: TimestampedQueue[float], n_tasks: int) -> List[float]:
+    items = drain(q)
+    _render(n_tasks)
+    return items
+
+
+def _make_signal() -> Callable[[TimestampedQueue[float], int], List[float]]:
+    seen_version = 0
+
+    def _signal(q: TimestampedQueue[float], n_tasks: int) -> List[float]:
+        nonlocal seen_version
+        if not has_updates(q, seen_version):
+            return []
+        seen_version = q.version
+        items = drain(q)
+        if items:
+            _render(n_tasks)
+        return items
+
+    return _signal
+
+
+def _session(
+    tick: Callable[[TimestampedQueue[float], int], List[float]],
+    interval: float,
+    backoff: bool,
+    fragments: int,
+    q: TimestampedQueue[float],
+    n_tasks: int,
+    n_results: int,
+    idle_seconds: float,
+    scale: float,
+) -> None:
+    min_interval, max_interval = interval, interval * 16
+
+    def _tick() -> None:
+        nonlocal interval
+        time.sleep(interval)
+        now = time.perf_counter()
+        items = tick(q, n_tasks)
+        latencies.extend(now - put_at for put_at in items)
+        if backoff:
+            interval = next_check_interval(
+                interval, bool(items), min_interval, max_interval
+            )
+
+    latencies: List[float] = []
+    while len(latencies) < n_results:
+        _tick()
+
+    cpu_start = time.process_time()
+    idle_end = time.perf_counter() + idle_seconds
+    reruns = 0
+    while time.perf_counter() < idle_end:
+        _tick()
+        reruns += 1
+    # CPU work is not scaled, so report it per unscaled second
+    idle_cpu = (time.process_time() - cpu_start) * scale / idle_seconds
+    idle_reruns = fragments * reruns * 60 * scale / idle_seconds
+
+    quantiles = [q / scale for q in statistics.quantiles(latencies, n=100)]
+    print(
+        f"{quantiles[49]:>9.2f}s {quantiles[98]:>9.2f}s "
+        f"{idle_cpu * 1000:>10.3f}ms/s {idle_reruns:>9.1f}/min"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--results", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=2_000)
+    parser.add_argument("--mean-gap", type=float, default=2.0)
+    parser.add_argument("--idle", type=float, default=60.0)
+    parser.add_argument("--time-scale", type=float, default=0.05)
+    args = parser.parse_args()
+
+    scale = args.time_scale
+    print(
+        f"{'strategy':<9} {'p50 lag':>10} {'p99 lag':>10} {'idle cpu':>12} "
+        f"{'idle reruns':>13}"
+    )
+    # the legacy app ran three fragments on every tick
+    for name, tick, interval, backoff, fragments in (
+        ("legacy", _legacy, 5.0, False, 3),
+        ("timer", _timer, 5.0, False, 1),
+        ("signal", _make_signal(), 1.0, False, 1),
+        ("backoff", _make_signal(), 1.0, True, 1),
+    ):
+        q: TimestampedQueue[float] = TimestampedQueue()
+        rng = random.Random(0)
+
+        def _produce() -> None:
+            for _ in range(args.results):
+                time.sleep(rng.expovariate(1 / args.mean_gap) * scale)
+                q.put(time.perf_counter())
+
+        producer = threading.Thread(target=_produce)
+        producer.start()
+        print(f"{name:<9}", end=" ", flush=True)
+        _session(
+            tick,
+            interval * scale,
+            backoff,
+            fragments,
+            q,
+            args.tasks,
+            args.results,
+            args.idle * scale,
+            scale,
+        )
+        producer.join()
+
+
+if __name__ == "__main__":
+    main()
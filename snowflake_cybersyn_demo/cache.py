@@ -0,0 +1,173 @@
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    disk_hits: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _DiskTier:
+    """SQLite-backed store so cached entries survive restarts.
+
+    Every write drops the namespace's expired rows and, past `maxsize` rows,
+    the ones that expire first, so the file stays bounded like the memory
+    tier.
+    """
+
+    def __init__(self, path: str, namespace: str, maxsize: int):
+        self._namespace = namespace
+        self._maxsize = maxsize
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT, key TEXT, value BLOB, expires_at REAL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM cache "
+            "WHERE namespace = ? AND key = ?",
+            (self._namespace, key),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(
+        self, key: str, value: bytes, expires_at: float, now: float
+    ) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+            (self._namespace, key, value, expires_at),
+        )
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self._namespace, now),
+        )
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache WHERE namespace = ? "
+            "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self._namespace, self._namespace, self._maxsize),
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        row = self._conn.execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?",
+            (self._namespace,),
+        ).fetchone()
+        return int(row[0])
+
+    def delete(self, key: str) -> None:
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?",
+            (self._namespace, key),
+        )
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ?", (self._namespace,)
+        )
+        self._conn.commit()
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    When `disk_path` is given, entries are also written to a SQLite file and
+    looked up there on a memory miss, so the cache survives restarts.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 86400.0,
+        disk_path: Optional[str] = None,
+        namespace: str = "default",
+        timer: Callable[[], float] = time.time,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._timer = timer
+        self._entries: OrderedDict[str, Tuple[V, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = (
+            _DiskTier(disk_path, namespace, maxsize) if disk_path else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[V]:
+        now = self._timer()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+                self.stats.expirations += 1
+
+            if self._disk is not None:
+                disk_entry = self._disk.get(key)
+                if disk_entry is not None:
+                    blob, expires_at = disk_entry
+                    if expires_at > now:
+                        value = pickle.loads(blob)
+                        self._store(key, value, expires_at)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return value
+                    self._disk.delete(key)
+                    self.stats.expirations += 1
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, value: V) -> None:
+        now = self._timer()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._disk is not None:
+                self._disk.set(key, pickle.dumps(value), expires_at, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.clear()
+
+    def _store(self, key: str, value: V, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self.stats.evictions += 1
+            logger.debug(f"Evicted {evicted_key} from cache.")
@@ -1,4 +1,5 @@
 import asyncio
+from typing import List
 
 import uvicorn
 from llama_agents import (
@@ -9,7 +10,7 @@ from llama_agents import (
 from llama_agents.message_queues.rabbitmq import RabbitMQMessageQueue
 from llama_index.core.query_pipeline import QueryPipeline
 from llama_index.core.selectors import PydanticSingleSelector
-from llama_index.llms.openai import OpenAI
+from llama_index.embeddings.openai import OpenAIEmbedding
 
 from snowflake_cybersyn_demo.additional_services.human_in_the_loop import (
     human_component,
@@ -22,7 +23,18 @@ from snowflake_cybersyn_demo.agent_services import (
     stats_getter_agent_component,
     time_series_getter_agent_component,
 )
-from snowflake_cybersyn_demo.utils import load_from_env
+from snowflake_cybersyn_demo.deployment.routing import (
+    CITY_STATS_PATTERNS,
+    GENERAL_PATTERNS,
+    TIMESERIES_PATTERNS,
+    CachedSelector,
+    PreRoutedSelector,
+    PreRouter,
+    RoutingCache,
+    RuleBasedPreRouter,
+)
+from snowflake_cybersyn_demo.llms import llm_provider
+from snowflake_cybersyn_demo.utils import load_bool_from_env, load_from_env
 
 message_queue_host = load_from_env("RABBITMQ_HOST")
 message_queue_port = load_from_env("RABBITMQ_NODE_PORT")
@@ -70,8 +82,46 @@ statistics for a specified city.
 general_pipeline = QueryPipeline(chain=[funny_agent_component])
 general_pipeline_orchestrator = PipelineOrchestrator(general_pipeline)
 
+# routing cache, near-identical tasks skip the LLM selector
+routing_cache_embeddings = load_bool_from_env(
+    "ROUTING_CACHE_EMBEDDINGS", False
+)
+routing_cache = RoutingCache(
+    maxsize=int(load_from_env("ROUTING_CACHE_MAXSIZE", "1024")),
+    ttl=float(load_from_env("ROUTING_CACHE_TTL", "3600")),
+    embed_model=(
+        OpenAIEmbedding(model="text-embedding-3-small")
+        if routing_cache_embeddings
+        else None
+    ),
+    similarity=float(load_from_env("ROUTING_CACHE_SIMILARITY", "0.92")),
+)
+
+# keyword rules route clear-cut tasks before the cache and the LLM. Off by
+# default until they are checked against a corpus of real tasks
+routing_rules_enabled = load_bool_from_env("ROUTING_RULES_ENABLED", False)
+rule_based_pre_router = RuleBasedPreRouter(
+    rules={
+        timeseries_task_pipeline_desc: TIMESERIES_PATTERNS,
+        city_stats_pipeline_desc: CITY_STATS_PATTERNS,
+        funny_agent_server.description: GENERAL_PATTERNS,
+    },
+    min_score=int(load_from_env("ROUTING_RULES_MIN_SCORE", "2")),
+)
+pre_routers: List[PreRouter] = (
+    [rule_based_pre_router] if routing_rules_enabled else []
+)
+
 pipeline_orchestrator = OrchestratorRouter(
-    selector=PydanticSingleSelector.from_defaults(llm=OpenAI("gpt-4o-mini")),
+    selector=PreRoutedSelector(
+        CachedSelector(
+            PydanticSingleSelector.from_defaults(
+                llm=llm_provider.get("gpt-4o-mini")
+            ),
+            cache=routing_cache,
+        ),
+        pre_routers=pre_routers,
+    ),
     orchestrators=[
         timeseries_pipeline_orchestrator,
         city_stats_pipeline_orchestrator,
@@ -0,0 +1,419 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from llama_index.core.base.base_selector import (
+    BaseSelector,
+    SelectorResult,
+    SingleSelection,
+)
+from llama_index.core.prompts.mixin import PromptDictType, PromptMixinType
+from llama_index.core.schema import QueryBundle
+from llama_index.core.tools.types import ToolMetadata
+
+from snowflake_cybersyn_demo.cache import TTLCache
+
+if TYPE_CHECKING:
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+_GOODS = (
+    r"(gasoline|diesel|eggs?|milk|bread|coffee|beef|chicken|electricity|"
+    r"rice|sugar|butter)"
+)
+_PRICE_TREND = r"(history|historical|trend|over time|time ?series)"
+
+# Each matching pattern scores one point. Words that are common outside of
+# a pipeline's domain ("history", "how much", "state", "age") only count
+# next to a domain term, and by default one match is not enough to route.
+
+# tasks about the price of goods, for the timeseries pipeline
+TIMESERIES_PATTERNS = [
+    r"\bprices?\b",
+    rf"\b{_GOODS}\b",
+    rf"\b(costs?|how much)\b.*\b{_GOODS}\b",
+    rf"\bprices?\b.*\b{_PRICE_TREND}\b|\b{_PRICE_TREND}\b.*\bprices?\b",
+]
+# tasks about cities, for the city statistics pipeline
+CITY_STATS_PATTERNS = [
+    r"\b(city|cities|town|county)\b",
+    r"\b(population|demographics?|census|residents|households?)\b",
+    r"\b(statistics?|stats)\b",
+    r"\b(income|unemployment|poverty|employment|education|median age)\b",
+]
+# jokes and chit-chat, for the general (funny) agent
+GENERAL_PATTERNS = [
+    r"\b(jokes?|funny|laugh|puns?|humou?r)\b",
+    r"\b(haiku|poem|story)\b",
+    r"\b(tell me|make me|write me) (a |an |another |something )?"
+    r"(joke|pun|laugh|funny|haiku|poem)",
+]
+
+
+@dataclass
+class RoutingCacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return hits / lookups if lookups else 0.0
+
+
+def normalize_task(text: str) -> str:
+    """Task text ignoring case, punctuation and whitespace."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", text).split()).casefold()
+
+
+def _fingerprint(choices: Sequence[ToolMetadata]) -> str:
+    # a change to the choices must not reuse old selections
+    descriptions = "\n".join(choice.description for choice in choices)
+    return hashlib.sha1(descriptions.encode("utf-8")).hexdigest()[:12]
+
+
+class _SemanticIndex:
+    """Unit vectors of cached task texts, oldest dropped first."""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._keys: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        if self._vectors is None:
+            return None
+        similarities = self._vectors @ vector
+        ix = int(np.argmax(similarities))
+        return self._keys[ix], float(similarities[ix])
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        row = vector[np.newaxis, :]
+        if self._vectors is None:
+            self._vectors = row
+        else:
+            self._vectors = np.vstack([self._vectors, row])[-self._maxsize :]
+        self._keys = (self._keys + [key])[-self._maxsize :]
+
+
+class RoutingCache:
+    """Selector results by normalized task text.
+
+    Identical tasks, up to case, punctuation and whitespace, hit the exact
+    tier. With an `embed_model`, a task whose embedding has a cosine
+    similarity of at least `similarity` with a cached task reuses its
+    selection too. Embedding a task is much cheaper than asking the LLM to
+    route it, but still a request, so it is only done on an exact miss.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        embed_model: Optional["BaseEmbedding"] = None,
+        similarity: float = 0.92,
+    ):
+        self.embed_model = embed_model
+        self.similarity = similarity
+        self.stats = RoutingCacheStats()
+        self._maxsize = maxsize
+        self._results: TTLCache[SelectorResult] = TTLCache(maxsize, ttl)
+        self._semantic: Dict[str, _SemanticIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[SelectorResult]:
+        """The selection cached for exactly this key."""
+        result = self._results.get(key)
+        if result is not None:
+            self._record("exact")
+        return result
+
+    def get_similar(
+        self, fingerprint: str, vector: Optional[np.ndarray]
+    ) -> Optional[SelectorResult]:
+        """The selection of the most similar cached task, if close enough.
+
+        Called after `get` missed, so a miss here is counted as a miss.
+        """
+        result = None
+        if vector is not None:
+            with self._lock:
+                index = self._semantic.get(fingerprint)
+                nearest = index.nearest(vector) if index else None
+            if nearest is not None and nearest[1] >= self.similarity:
+                # expired and evicted selections are gone from the exact tier
+                result = self._results.get(nearest[0])
+        self._record("miss" if result is None else "semantic")
+        return result
+
+    def set(
+        self,
+        key: str,
+        fingerprint: str,
+        vector: Optional[np.ndarray],
+        result: SelectorResult,
+    ) -> None:
+        self._results.set(key, result)
+        if vector is not None:
+            with self._lock:
+                self._semantic.setdefault(
+                    fingerprint, _SemanticIndex(self._maxsize)
+                ).add(key, vector)
+
+    def _record(self, kind: str) -> None:
+        with self._lock:
+            if kind == "exact":
+                self.stats.exact_hits += 1
+            elif kind == "semantic":
+                self.stats.semantic_hits += 1
+            else:
+                self.stats.misses += 1
+            hit_rate = self.stats.hit_rate
+        logger.info(f"Routing cache {kind} (hit rate {hit_rate:.0%}).")
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CachedSelector(BaseSelector):
+    """Selector that answers repeated routing questions from a cache.
+
+    Only cache misses are passed to the wrapped `selector`.
+    """
+
+    def __init__(self, selector: BaseSelector, cache: RoutingCache):
+        self.selector = selector
+        self.cache = cache
+
+    def _get_prompts(self) -> PromptDictType:
+        return {}
+
+    def _update_prompts(self, prompts_dict: PromptDictType) -> None:
+        pass
+
+    def _get_prompt_modules(self) -> PromptMixinType:
+        return {"selector": self.selector}
+
+    def select_with_hit(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> Tuple[SelectorResult, bool]:
+        """The selection, and whether it was answered from the cache."""
+        fingerprint = _fingerprint(choices)
+        key = f"{fingerprint}:{normalize_task(query.query_str)}"
+        if (result := self.cache.get(key)) is not None:
+            return result, True
+        vector = None
+        if self.cache.embed_model is not None:
+            vector = _unit(
+                self.cache.embed_model.get_query_embedding(query.query_str)
+            )
+        if (result := self.cache.get_similar(fingerprint, vector)) is not None:
+            return result, True
+        result = self.selector.select(choices, query)
+        self.cache.set(key, fingerprint, vector, result)
+        return result, False
+
+    async def aselect_with_hit(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> Tuple[SelectorResult, bool]:
+        """The selection, and whether it was answered from the cache."""
+        fingerprint = _fingerprint(choices)
+        key = f"{fingerprint}:{normalize_task(query.query_str)}"
+        if (result := self.cache.get(key)) is not None:
+            return result, True
+        vector = None
+        if self.cache.embed_model is not None:
+            vector = _unit(
+                await self.cache.embed_model.aget_query_embedding(
+                    query.query_str
+                )
+            )
+        if (result := self.cache.get_similar(fingerprint, vector)) is not None:
+            return result, True
+        result = await self.selector.aselect(choices, query)
+        self.cache.set(key, fingerprint, vector, result)
+        return result, False
+
+    def _select(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> SelectorResult:
+        return self.select_with_hit(choices, query)[0]
+
+    async def _aselect(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> SelectorResult:
+        return (await self.aselect_with_hit(choices, query))[0]
+
+
+class PreRouter(Protocol):
+    """Cheap routing stage, returns `None` to defer to the next stage."""
+
+    def __call__(
+        self, choices: Sequence[ToolMetadata], task: str
+    ) -> Optional[SelectorResult]:
+        ...
+
+
+class RuleBasedPreRouter:
+    """Routes tasks that match the patterns of exactly one choice best.
+
+    `rules` maps a choice description to regular expressions, matched
+    case-insensitively. A choice scores one point per matching pattern, and
+    a task is routed when the best choice scores at least `min_score`
+    points and `min_margin` points more than the runner-up. Anything else
+    is deferred.
+    """
+
+    def __init__(
+        self,
+        rules: Dict[str, Sequence[str]],
+        min_score: int = 2,
+        min_margin: int = 1,
+    ):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self._rules = {
+            description: [re.compile(p, re.IGNORECASE) for p in patterns]
+            for description, patterns in rules.items()
+        }
+
+    def scores(self, choices: Sequence[ToolMetadata], task: str) -> List[int]:
+        return [
+            sum(
+                1
+                for pattern in self._rules.get(choice.description, [])
+                if pattern.search(task)
+            )
+            for choice in choices
+        ]
+
+    def __call__(
+        self, choices: Sequence[ToolMetadata], task: str
+    ) -> Optional[SelectorResult]:
+        scores = self.scores(choices, task)
+        if not scores:
+            return None
+        best = max(range(len(scores)), key=scores.__getitem__)
+        runner_up = max(
+            (score for ix, score in enumerate(scores) if ix != best),
+            default=0,
+        )
+        if (
+            scores[best] < self.min_score
+            or scores[best] - runner_up < self.min_margin
+        ):
+            return None
+        return SelectorResult(
+            selections=[
+                SingleSelection(
+                    index=best,
+                    reason=f"Matched {scores[best]} routing rules.",
+                )
+            ]
+        )
+
+
+@dataclass
+class PathStats:
+    """Routing decisions made by one path, and how long they took."""
+
+    count: int = 0
+    # summed over decisions, in seconds
+    latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency / self.count if self.count else 0.0
+
+
+class PreRoutedSelector(BaseSelector):
+    """Selector that tries cheap `pre_routers` before `selector`.
+
+    The first pre-router to return a selection wins; when all defer, the
+    wrapped selector decides. `stats` counts decisions and their latency by
+    path: each pre-router by its class name, "routing_cache" for selections
+    a `CachedSelector` answered from its cache, and "selector".
+    """
+
+    def __init__(self, selector: BaseSelector, pre_routers: List[PreRouter]):
+        self.selector = selector
+        self.pre_routers = pre_routers
+        self.stats: Dict[str, PathStats] = {}
+        self._lock = threading.Lock()
+
+    def _get_prompts(self) -> PromptDictType:
+        return {}
+
+    def _update_prompts(self, prompts_dict: PromptDictType) -> None:
+        pass
+
+    def _get_prompt_modules(self) -> PromptMixinType:
+        return {"selector": self.selector}
+
+    def _pre_route(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> Optional[SelectorResult]:
+        start = time.perf_counter()
+        for pre_router in self.pre_routers:
+            result = pre_router(choices, query.query_str)
+            if result is not None:
+                self._record(type(pre_router).__name__, start)
+                return result
+        return None
+
+    def _record(self, path: str, start: float) -> None:
+        latency = time.perf_counter() - start
+        with self._lock:
+            stats = self.stats.setdefault(path, PathStats())
+            stats.count += 1
+            stats.latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+        logger.info(f"Routed task with {path} in {latency * 1000:.1f}ms.")
+
+    def _select(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> SelectorResult:
+        start = time.perf_counter()
+        if (result := self._pre_route(choices, query)) is not None:
+            return result
+        if isinstance(self.selector, CachedSelector):
+            result, hit = self.selector.select_with_hit(choices, query)
+        else:
+            result, hit = self.selector.select(choices, query), False
+        self._record("routing_cache" if hit else "selector", start)
+        return result
+
+    async def _aselect(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> SelectorResult:
+        start = time.perf_counter()
+        if (result := self._pre_route(choices, query)) is not None:
+            return result
+        if isinstance(self.selector, CachedSelector):
+            result, hit = await self.selector.aselect_with_hit(choices, query)
+        else:
+            result, hit = await self.selector.aselect(choices, query), False
+        self._record("routing_cache" if hit else "selector", start)
+        return result
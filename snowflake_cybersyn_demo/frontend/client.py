@@ -0,0 +1,147 @@
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+import httpx
+from llama_agents import LlamaAgentsClient
+from llama_agents.types import TaskDefinition
+
+from snowflake_cybersyn_demo.utils import load_from_env
+
+logger = logging.getLogger(__name__)
+
+# responses worth retrying, the control plane may be restarting
+_RETRY_STATUS_CODES = (502, 503, 504)
+
+
+@dataclass
+class HttpClientConfig:
+    """Connection pool, timeout and retry settings for the control plane."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    # seconds an idle pooled connection is kept open
+    keepalive_expiry: float = 30.0
+    timeout: float = 120.0
+    connect_timeout: float = 5.0
+    retries: int = 3
+    # base of the exponential backoff between retries, in seconds
+    backoff: float = 0.2
+
+    @classmethod
+    def from_env(cls) -> "HttpClientConfig":
+        """Build a config from optional `CONTROL_PLANE_HTTP_*` env vars."""
+
+        def _from_env(var: str, default: Any) -> str:
+            return load_from_env(f"CONTROL_PLANE_HTTP_{var}", str(default))
+
+        default = cls()
+        return cls(
+            max_connections=int(
+                _from_env("MAX_CONNECTIONS", default.max_connections)
+            ),
+            max_keepalive_connections=int(
+                _from_env(
+                    "MAX_KEEPALIVE_CONNECTIONS",
+                    default.max_keepalive_connections,
+                )
+            ),
+            keepalive_expiry=float(
+                _from_env("KEEPALIVE_EXPIRY", default.keepalive_expiry)
+            ),
+            timeout=float(_from_env("TIMEOUT", default.timeout)),
+            connect_timeout=float(
+                _from_env("CONNECT_TIMEOUT", default.connect_timeout)
+            ),
+            retries=int(_from_env("RETRIES", default.retries)),
+            backoff=float(_from_env("BACKOFF", default.backoff)),
+        )
+
+
+class PooledLlamaAgentsClient(LlamaAgentsClient):
+    """`LlamaAgentsClient` that reuses one keep-alive `httpx.Client`.
+
+    The base client opens a new connection for every call. Here calls share
+    a connection pool and are retried with jittered exponential backoff.
+    Creating a task is not idempotent, so it is only retried when the
+    connection could not be established.
+    """
+
+    def __init__(
+        self,
+        control_plane_url: str,
+        config: Optional[HttpClientConfig] = None,
+    ):
+        self.config = config or HttpClientConfig()
+        super().__init__(control_plane_url, timeout=self.config.timeout)
+        self._http = httpx.Client(
+            base_url=control_plane_url,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=(
+                    self.config.max_keepalive_connections
+                ),
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                self.config.timeout, connect=self.config.connect_timeout
+            ),
+        )
+
+    def close(self) -> None:
+        self._http.close()
+
+    def _request(
+        self, method: str, path: str, idempotent: bool = True, **kwargs: Any
+    ) -> httpx.Response:
+        retryable = (
+            (httpx.TransportError,)
+            if idempotent
+            else (httpx.ConnectError, httpx.ConnectTimeout)
+        )
+        attempt = 0
+        while True:
+            try:
+                response = self._http.request(method, path, **kwargs)
+            except retryable:
+                if attempt >= self.config.retries:
+                    raise
+                logger.warning(f"{method} {path} failed, retrying.")
+            else:
+                if (
+                    idempotent
+                    and attempt < self.config.retries
+                    and response.status_code in _RETRY_STATUS_CODES
+                ):
+                    logger.warning(
+                        f"{method} {path} returned {response.status_code}, "
+                        "retrying."
+                    )
+                else:
+                    response.raise_for_status()
+                    return response
+            # full jitter, so that retrying clients spread out
+            time.sleep(random.uniform(0, self.config.backoff * 2**attempt))
+            attempt += 1
+
+    def create_task(self, task_def: Union[str, TaskDefinition]) -> str:
+        if isinstance(task_def, str):
+            task_def = TaskDefinition(input=task_def)
+        response = self._request(
+            "POST", "/tasks", idempotent=False, json=task_def.model_dump()
+        )
+        return str(response.json()["task_id"])
+
+    def get_tasks(self) -> Dict[str, TaskDefinition]:
+        task_dicts = self._request("GET", "/tasks").json()
+        return {
+            task_id: TaskDefinition(**task_dict)
+            for task_id, task_dict in task_dicts.items()
+        }
+
+    def get_task(self, task_id: str) -> TaskDefinition:
+        return TaskDefinition(
+            **self._request("GET", f"/tasks/{task_id}").json()
+        )
@@ -1,19 +1,32 @@
-import json
 import logging
-import queue
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Generator, List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 import pandas as pd
 import streamlit as st
-from llama_agents import LlamaAgentsClient
 from llama_agents.types import TaskResult
 from llama_index.core.llms import ChatMessage, ChatResponseGen
 
-from snowflake_cybersyn_demo.additional_services.human_in_the_loop import (
-    HumanRequest,
+from snowflake_cybersyn_demo.frontend.client import (
+    HttpClientConfig,
+    PooledLlamaAgentsClient,
+)
+from snowflake_cybersyn_demo.frontend.final_task_consumer import (
+    TaskResultStore,
+    TaskResultView,
 )
+from snowflake_cybersyn_demo.workflows._handoff import ResponseRegistry
+from snowflake_cybersyn_demo.workflows.human_in_the_loop import HumanRequest
 
 logger = logging.getLogger(__name__)
 
@@ -33,18 +46,158 @@ class TaskModel:
     history: List[ChatMessage] = field(default_factory=list)
 
 
+# order in which tasks are listed, each status in order of arrival
+TASK_STATUS_ORDER = (
+    TaskStatus.SUBMITTED,
+    TaskStatus.HUMAN_REQUIRED,
+    TaskStatus.COMPLETED,
+)
+
+
+class TaskStore:
+    """Tasks keyed by `task_id`, with a secondary index by status.
+
+    Lookups and status transitions are O(1). The per-status index is an
+    insertion-ordered dict, so tasks of a status iterate in the order they
+    moved into it. `version` is bumped on every change, and
+    `changed_since` lists the tasks changed after a given version.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, TaskModel] = {}
+        self._by_status: Dict[TaskStatus, Dict[str, None]] = {
+            status: {} for status in TaskStatus
+        }
+        self.version = 0
+        # task id -> version of its last change, ordered by that version
+        self._changed: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def __iter__(self) -> Iterator[TaskModel]:
+        """Iterate over tasks grouped by `TASK_STATUS_ORDER`."""
+        for status in TASK_STATUS_ORDER:
+            yield from self.with_status(status)
+
+    def add(self, task: TaskModel) -> None:
+        if task.task_id in self._tasks:
+            raise ValueError(f"Task {task.task_id} already exists.")
+        self._tasks[task.task_id] = task
+        self._by_status[task.status][task.task_id] = None
+        self._touch(task.task_id)
+
+    def get(self, task_id: str) -> Optional[TaskModel]:
+        return self._tasks.get(task_id)
+
+    def with_status(self, status: TaskStatus) -> List[TaskModel]:
+        return [self._tasks[task_id] for task_id in self._by_status[status]]
+
+    def count(self, status: TaskStatus) -> int:
+        return len(self._by_status[status])
+
+    def changed_since(self, version: int) -> List[TaskModel]:
+        """Tasks added or changed after `version`, oldest change first."""
+        changed = []
+        for task_id in reversed(self._changed):
+            if self._changed[task_id] <= version:
+                break
+            changed.append(self._tasks[task_id])
+        return changed[::-1]
+
+    def transition(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        from_statuses: Optional[Tuple[TaskStatus, ...]] = None,
+    ) -> TaskModel:
+        """Move a task to `status` and return it.
+
+        Raises `ValueError` if the task is unknown or, when `from_statuses`
+        is given, not currently in one of them.
+        """
+        if (task := self._tasks.get(task_id)) is None:
+            raise ValueError(f"Cannot find task {task_id}.")
+        if from_statuses is not None and task.status not in from_statuses:
+            raise ValueError(
+                f"Task {task_id} is {task.status.value}, expected one of "
+                f"{[s.value for s in from_statuses]}."
+            )
+        del self._by_status[task.status][task_id]
+        task.status = status
+        self._by_status[status][task_id] = None
+        self._touch(task_id)
+        return task
+
+    def _touch(self, task_id: str) -> None:
+        self.version += 1
+        self._changed.pop(task_id, None)
+        self._changed[task_id] = self.version
+
+
+class TaskTable:
+    """Task status table kept in sync with a `TaskStore` incrementally.
+
+    Rows are in submission order. `sync` only appends rows for new tasks and
+    patches the status of changed ones, and does nothing while the store's
+    version is unchanged, so refreshing costs nothing when idle.
+    """
+
+    COLUMNS = ("task_id", "input", "status")
+
+    def __init__(self) -> None:
+        self.df = pd.DataFrame(columns=list(self.COLUMNS))
+        self.version = 0
+        self._rows: Dict[str, int] = {}
+        self._status_column = self.COLUMNS.index("status")
+
+    def sync(self, store: TaskStore) -> bool:
+        """Apply changes from `store`; returns whether the table changed."""
+        if store.version == self.version:
+            return False
+
+        new_tasks = []
+        for task in store.changed_since(self.version):
+            if (row := self._rows.get(task.task_id)) is not None:
+                self.df.iat[row, self._status_column] = task.status.value
+            else:
+                self._rows[task.task_id] = len(self._rows)
+                new_tasks.append(task)
+        if new_tasks:
+            new_rows = pd.DataFrame(
+                {
+                    "task_id": [t.task_id for t in new_tasks],
+                    "input": [t.input for t in new_tasks],
+                    "status": [t.status.value for t in new_tasks],
+                }
+            )
+            self.df = (
+                pd.concat([self.df, new_rows], ignore_index=True)
+                if len(self.df)
+                else new_rows
+            )
+        self.version = store.version
+        return True
+
+
 class Controller:
     def __init__(
         self,
         control_plane_host: str = "127.0.0.1",
         control_plane_port: Optional[int] = 8000,
+        task_results: Optional[TaskResultStore] = None,
     ):
-        self._client = LlamaAgentsClient(
+        self._task_results = task_results or TaskResultStore()
+        self._client = PooledLlamaAgentsClient(
             control_plane_url=(
                 f"http://{control_plane_host}:{control_plane_port}"
                 if control_plane_port
                 else f"http://{control_plane_host}"
-            )
+            ),
+            config=HttpClientConfig.from_env(),
         )
         self._step_interval = 0.5
         self._timeout = 60
@@ -57,7 +210,19 @@ class Controller:
             yield chunk.delta
 
     def get_task_result(self, task_id: str) -> Optional[TaskResult]:
-        return self._client.get_task_result(task_id=task_id)
+        """Get a task result from the local store, or else the control plane."""
+        if (task_res := self._task_results.get(task_id)) is not None:
+            return task_res
+        if (task_res := self._client.get_task_result(task_id=task_id)) is None:
+            return None
+        self._task_results.put(task_res)
+        return task_res
+
+    def get_task_result_view(self, task_id: str) -> Optional[TaskResultView]:
+        """Get the memoized display-ready view of a task result."""
+        if self.get_task_result(task_id) is None:
+            return None
+        return self._task_results.get_view(task_id)
 
     def handle_task_submission(self) -> None:
         """Handle the user submitted message. Clear task submission box, and
@@ -77,20 +242,26 @@ class Controller:
             ],
             status=TaskStatus.SUBMITTED,
         )
-        st.session_state.submitted_tasks.append(task)
-        logger.info("Added task to submitted queue")
+        st.session_state.tasks.add(task)
+        logger.info("Added task to submitted tasks")
         st.session_state.current_task = task
         st.session_state.task_input = ""
 
     def get_human_input_handler(
-        self, human_input_result_queue: queue.Queue
+        self, human_input_responses: ResponseRegistry[str]
     ) -> Callable:
         def human_input_handler() -> None:
             human_input = st.session_state.human_input
             if human_input == "":
                 return
-            human_input_result_queue.put_nowait(human_input)
-            logger.info("pushed human input to human input result queue.")
+            if st.session_state.current_task is None:
+                logger.warning("no task selected to hand human input to.")
+                return
+            task_id = st.session_state.current_task.task_id
+            if human_input_responses.resolve(task_id, human_input):
+                logger.info(f"handed human input to task {task_id}.")
+            else:
+                logger.warning(f"task {task_id} is not waiting for input.")
 
         return human_input_handler
 
@@ -101,42 +272,17 @@ class Controller:
         """
         Update task status to completed for received task result.
 
-        Update session_state lists as well.
+        The task must be submitted or waiting for human input.
         """
-
-        def remove_task_from_list(
-            task_list: List[TaskModel],
-        ) -> List[TaskModel]:
-            try:
-                ix, task = next(
-                    (ix, t)
-                    for ix, t in enumerate(task_list)
-                    if t.task_id == task_res.task_id
-                )
-                task.status = TaskStatus.COMPLETED
-                task.history.append(
-                    ChatMessage(role="assistant", content=task_res.result)
-                )
-                del task_list[ix]
-                st.session_state.completed_tasks.append(task)
-                logger.info("updated submitted and completed tasks list.")
-            except StopIteration:
-                raise ValueError("Cannot find task in list of tasks.")
-            return task_list
-
-        submitted_tasks = st.session_state.get("submitted_tasks")
-        human_required_tasks = st.session_state.get("human_required_tasks")
-
-        if task_res.task_id in [t.task_id for t in submitted_tasks]:
-            updated_task_list = remove_task_from_list(submitted_tasks)
-            st.session_state.submitted_tasks = updated_task_list
-        elif task_res.task_id in [t.task_id for t in human_required_tasks]:
-            updated_task_list = remove_task_from_list(human_required_tasks)
-            st.session_state.human_required_tasks = updated_task_list
-        else:
-            raise ValueError(
-                "Completed task not in submitted or human_required lists."
-            )
+        task = st.session_state.tasks.transition(
+            task_res.task_id,
+            TaskStatus.COMPLETED,
+            from_statuses=(TaskStatus.SUBMITTED, TaskStatus.HUMAN_REQUIRED),
+        )
+        task.history.append(
+            ChatMessage(role="assistant", content=task_res.result)
+        )
+        logger.info(f"updated task {task.task_id} to completed.")
 
     def update_associated_task_to_human_required_status(
         self,
@@ -145,26 +291,39 @@ class Controller:
         """
         Update task status to human_required for received task request.
 
-        Update session_state lists as well.
+        The task must be submitted.
         """
-        try:
-            task_list = st.session_state.get("submitted_tasks")
-            print(f"submitted tasks: {task_list}")
-            ix, task = next(
-                (ix, t)
-                for ix, t in enumerate(task_list)
-                if t.task_id == human_req["task_id"]
-            )
-            task.status = TaskStatus.HUMAN_REQUIRED
-            task.history.append(
-                ChatMessage(role="assistant", content=human_req["prompt"])
-            )
-            del task_list[ix]
-            st.session_state.submitted_tasks = task_list
-            st.session_state.human_required_tasks.append(task)
-            logger.info("updated submitted and human required tasks list.")
-        except StopIteration:
-            raise ValueError("Cannot find task in list of tasks.")
+        task = st.session_state.tasks.transition(
+            human_req["task_id"],
+            TaskStatus.HUMAN_REQUIRED,
+            from_statuses=(TaskStatus.SUBMITTED,),
+        )
+        task.history.append(
+            ChatMessage(role="assistant", content=human_req["prompt"])
+        )
+        logger.info(f"updated task {task.task_id} to human required.")
+
+    def update_tasks_to_completed_status(
+        self, task_results: List[TaskResult]
+    ) -> None:
+        """Apply a batch of task results, skipping unknown tasks."""
+        for task_res in task_results:
+            try:
+                self.update_associated_task_to_completed_status(task_res)
+            except ValueError:
+                logger.exception(f"Could not complete task {task_res.task_id}")
+
+    def update_tasks_to_human_required_status(
+        self, human_reqs: List[HumanRequest]
+    ) -> None:
+        """Apply a batch of human requests, skipping unknown tasks."""
+        for human_req in human_reqs:
+            try:
+                self.update_associated_task_to_human_required_status(human_req)
+            except ValueError:
+                logger.exception(
+                    f"Could not request human input for {human_req['task_id']}"
+                )
 
     def get_task_selection_handler(self, task_df: pd.DataFrame) -> Callable:
         def task_selection_handler() -> None:
@@ -178,35 +337,8 @@ class Controller:
 
             # display chat history in console
             selected_row = st.session_state.task_df["selection"]["rows"][0]
-            selection = task_df.iloc[selected_row]
-            task_status = selection["status"]
-            task_id = selection["task_id"]
-            if task_status == TaskStatus.COMPLETED:
-                task_list = st.session_state.completed_tasks
-            elif task_status == TaskStatus.HUMAN_REQUIRED:
-                task_list = st.session_state.human_required_tasks
-            else:
-                task_list = st.session_state.submitted_tasks
-
-            try:
-                task = next(t for t in task_list if t.task_id == task_id)
+            task_id = task_df.iloc[selected_row]["task_id"]
+            if task := st.session_state.tasks.get(task_id):
                 st.session_state.current_task = task
-            except StopIteration:
-                pass  # handle this better
 
         return task_selection_handler
-
-    def infer_task_type(self, task_res: TaskResult) -> str:
-        def try_parse_as_json(text: str) -> Any:
-            try:
-                return json.loads(text)
-            except json.JSONDecodeError:
-                return None
-
-        if task_res_json := try_parse_as_json(task_res.result):
-            if "good" in task_res_json[0]:
-                return "timeseries-good"
-            if "variable" in task_res_json[0]:
-                return "timeseries-city-stat"
-
-        return "text"
@@ -1,6 +1,6 @@
 import logging
-import queue
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
 
 from llama_agents import CallableMessageConsumer, QueueMessage
 from llama_agents.message_consumers.base import (
@@ -10,17 +10,83 @@ from llama_agents.message_consumers.base import (
 from llama_agents.message_queues.base import BaseMessageQueue
 from llama_agents.types import ActionTypes, TaskResult
 
+from snowflake_cybersyn_demo.cache import TTLCache
+from snowflake_cybersyn_demo.queues import TimestampedQueue, put_async
+from snowflake_cybersyn_demo.timeseries import TimeSeries, aggregate_by_date
+
 logger = logging.getLogger(__name__)
 
+# bar colors for price and city statistic series
+_CHART_COLORS = {"good": "#FF91AF", "variable": "#73CED0"}
+
+
+@dataclass
+class TaskResultView:
+    """Display-ready form of a task result.
+
+    Time series results are aggregated by date, with `chart_data` ready to
+    pass to `st.bar_chart`; other results are shown as `text`.
+    """
+
+    text: str
+    timeseries: Optional[TimeSeries] = None
+    chart_data: Optional[Dict[str, Any]] = None
+    color: str = ""
+
+    @classmethod
+    def from_task_result(cls, task_res: TaskResult) -> "TaskResultView":
+        try:
+            timeseries = aggregate_by_date(TimeSeries.parse(task_res.result))
+        except ValueError:
+            return cls(text=task_res.result)
+        return cls(
+            text=task_res.result,
+            timeseries=timeseries,
+            chart_data={
+                "dates": timeseries.date_strings(),
+                timeseries.value_key: timeseries.values,
+            },
+            color=_CHART_COLORS.get(timeseries.label_key, ""),
+        )
+
+
+class TaskResultStore:
+    """Task results received over the message queue, keyed by task id.
+
+    Views are built on first use and memoized, so showing a finished task
+    again costs no request to the control plane and no re-parse.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 86400.0):
+        self._results: TTLCache[TaskResult] = TTLCache(maxsize, ttl)
+        self._views: TTLCache[TaskResultView] = TTLCache(maxsize, ttl)
+
+    def put(self, task_res: TaskResult) -> None:
+        self._results.set(task_res.task_id, task_res)
+
+    def get(self, task_id: str) -> Optional[TaskResult]:
+        return self._results.get(task_id)
+
+    def get_view(self, task_id: str) -> Optional[TaskResultView]:
+        if (view := self._views.get(task_id)) is not None:
+            return view
+        if (task_res := self._results.get(task_id)) is None:
+            return None
+        view = TaskResultView.from_task_result(task_res)
+        self._views.set(task_id, view)
+        return view
+
 
 class FinalTaskConsumer:
     def __init__(
         self,
         message_queue: BaseMessageQueue,
-        completed_tasks_queue: queue.Queue,
+        completed_tasks_queue: TimestampedQueue[TaskResult],
+        task_results: Optional[TaskResultStore] = None,
     ):
         self.message_queue = message_queue
         self.completed_tasks_queue = completed_tasks_queue
+        self.task_results = task_results
         self.name: str = "human"
 
     async def _process_completed_task_messages(
@@ -34,7 +100,11 @@ class FinalTaskConsumer:
         """
         if message.action == ActionTypes.COMPLETED_TASK:
             task_res = TaskResult(**message.data)
-            self.completed_tasks_queue.put(task_res)
+            # store before queueing so the result is there once it is shown
+            if self.task_results is not None:
+                self.task_results.put(task_res)
+            # waits while the queue is full, which holds back the ack
+            await put_async(self.completed_tasks_queue, task_res)
             logger.info("Added task result to queue")
 
     def as_consumer(self, remote: bool = False) -> BaseMessageQueueConsumer:
@@ -0,0 +1,166 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Readiness:
+    """Startup phases that each signal once they have completed.
+
+    Phases run on the background loop inside `phase`, which records how
+    long they took and sets their event, also when they fail. Another
+    thread waits for all of them with `wait`.
+    """
+
+    def __init__(self, phases: List[str]):
+        self._events = {name: threading.Event() for name in phases}
+        self._started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, BaseException] = {}
+
+    @asynccontextmanager
+    async def phase(self, name: str) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.errors[name] = e
+            raise
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            self._events[name].set()
+
+    @property
+    def pending(self) -> List[str]:
+        return [name for name, e in self._events.items() if not e.is_set()]
+
+    def wait(self, timeout: Optional[float] = None) -> float:
+        """Wait for every phase and return the seconds since creation.
+
+        Raises `TimeoutError` if some phases are still pending after
+        `timeout` seconds and `RuntimeError` if any phase failed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in self._events.values():
+            remaining = (
+                None if deadline is None else deadline - time.monotonic()
+            )
+            if remaining is not None and remaining <= 0:
+                break
+            if not event.wait(remaining):
+                break
+        if self.pending:
+            raise TimeoutError(
+                f"Startup phases {self.pending} not ready after {timeout}s "
+                f"({self.summary()})."
+            )
+        if self.errors:
+            raise RuntimeError(
+                f"Startup phases {list(self.errors)} failed "
+                f"({self.summary()})."
+            ) from next(iter(self.errors.values()))
+        return time.perf_counter() - self._started_at
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name}: {seconds * 1000:.0f}ms"
+            for name, seconds in self.timings.items()
+        )
+
+
+class BackgroundRuntime:
+    """A single daemon thread running one event loop for background work.
+
+    All of the app's message consumers and processing loops run as tasks on
+    this loop, so they can share one message queue connection. Coroutines
+    are submitted from other threads with `run` (wait for the result) or
+    `spawn` (long-running tasks, cancelled on `shutdown`).
+    """
+
+    def __init__(self, name: str = "frontend-runtime"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name=name, daemon=True
+        )
+        self._tasks: List[asyncio.Task] = []
+        self._cleanups: List[Callable[[], Awaitable[Any]]] = []
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def run(
+        self,
+        coro: Coroutine[Any, Any, T],
+        timeout: Optional[float] = None,
+    ) -> T:
+        """Run `coro` on the loop and wait for its result.
+
+        Raises `TimeoutError` if it does not finish within `timeout` seconds
+        (the coroutine is then cancelled).
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Timed out after {timeout}s.")
+
+    def spawn(self, coro: Coroutine[Any, Any, Any], name: str) -> None:
+        """Start a long-running task on the loop, from any thread."""
+
+        def _create_task() -> None:
+            task = self.loop.create_task(coro, name=name)
+            task.add_done_callback(self._on_task_done)
+            self._tasks.append(task)
+
+        self.loop.call_soon_threadsafe(_create_task)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            logger.error(f"Task {task.get_name()} failed", exc_info=exc)
+
+    def add_cleanup(self, cleanup: Callable[[], Awaitable[Any]]) -> None:
+        """Register a coroutine function to await on shutdown."""
+        self._cleanups.append(cleanup)
+
+    async def _shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for cleanup in reversed(self._cleanups):
+            try:
+                await cleanup()
+            except Exception:
+                logger.exception("Cleanup failed during shutdown")
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Cancel spawned tasks, run cleanups and stop the loop."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self.run(self._shutdown(), timeout=timeout)
+        except TimeoutError:
+            logger.warning("Background runtime did not shut down in time.")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=timeout)
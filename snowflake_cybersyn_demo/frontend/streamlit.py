@@ -1,34 +1,47 @@
-import asyncio
-import json
+import atexit
 import logging
-import queue
-import threading
-import time
-from typing import Optional, Tuple
+from typing import Tuple
 
-import pandas as pd
 import streamlit as st
 from llama_agents.types import TaskResult
-from llama_index.llms.openai import OpenAI
 
-from snowflake_cybersyn_demo.additional_services.human_in_the_loop import (
-    HumanRequest,
-    HumanService,
+from snowflake_cybersyn_demo.frontend.controller import (
+    Controller,
+    TaskStore,
+    TaskTable,
 )
-from snowflake_cybersyn_demo.agent_services.financial_and_economic_essentials.time_series_getter_agent import (
-    perform_price_aggregation,
+from snowflake_cybersyn_demo.frontend.final_task_consumer import (
+    FinalTaskConsumer,
+    TaskResultStore,
 )
-from snowflake_cybersyn_demo.agent_services.government_essentials.stats_fulfiller_agent import (
-    perform_date_value_aggregation,
+from snowflake_cybersyn_demo.frontend.runtime import (
+    BackgroundRuntime,
+    Readiness,
 )
-from snowflake_cybersyn_demo.apps.controller import Controller
-from snowflake_cybersyn_demo.apps.final_task_consumer import FinalTaskConsumer
+from snowflake_cybersyn_demo.queues import (
+    TimestampedQueue,
+    drain,
+    has_updates,
+    next_check_interval,
+    queue_from_env,
+)
+from snowflake_cybersyn_demo.workflows._handoff import ResponseRegistry
+from snowflake_cybersyn_demo.workflows.human_in_the_loop import HumanRequest
 
 logger = logging.getLogger(__name__)
 
-llm = OpenAI(model="gpt-4o-mini")
 control_plane_host = "0.0.0.0"
 control_plane_port = 8001
+# how often to check for task updates; idle checks only compare versions.
+# The interval doubles while the queues stay idle and drops back to the
+# minimum on any update or user input
+UPDATE_CHECK_MIN_INTERVAL = 1.0
+UPDATE_CHECK_MAX_INTERVAL = 16.0
+# upper bounds on the queued items applied per fragment run
+DRAIN_MAX_ITEMS = 100
+DRAIN_MAX_SECONDS = 0.05
+# seconds to wait for the background consumers to register
+STARTUP_TIMEOUT = 30
 
 
 st.set_page_config(layout="wide")
@@ -38,85 +51,92 @@ st.set_page_config(layout="wide")
 def startup() -> (
     Tuple[
         Controller,
-        queue.Queue[TaskResult],
+        TimestampedQueue[TaskResult],
         FinalTaskConsumer,
-        queue.Queue[HumanRequest],
-        queue.Queue[str],
+        TimestampedQueue[HumanRequest],
+        ResponseRegistry[str],
     ]
 ):
-    from snowflake_cybersyn_demo.additional_services.human_in_the_loop import (
+    from snowflake_cybersyn_demo.workflows.human_in_the_loop import (
         human_input_request_queue,
-        human_input_result_queue,
+        human_input_responses,
         human_service,
         message_queue,
     )
 
+    # filled by the final task consumer, read by the controller
+    task_results = TaskResultStore()
     controller = Controller(
         control_plane_host=control_plane_host,
         control_plane_port=control_plane_port,
+        task_results=task_results,
     )
 
-    async def start_consuming_human_tasks(hs: HumanService) -> None:
-        # register to control plane
-        await hs.register_to_control_plane(
-            control_plane_url=(
-                f"http://{control_plane_host}:{control_plane_port}"
-                if control_plane_port
-                else f"http://{control_plane_host}"
-            )
-        )
-
-        consuming_callable = await message_queue.register_consumer(
-            hs.as_consumer()
-        )
-
-        ht_task = asyncio.create_task(consuming_callable())  # noqa: F841
-
-        pl_task = asyncio.create_task(hs.processing_loop())  # noqa: F841
-
-        await asyncio.Future()
-
-    hr_thread = threading.Thread(
-        name="Human Request thread",
-        target=asyncio.run,
-        args=(start_consuming_human_tasks(human_service),),
-        daemon=False,
-    )
-    hr_thread.start()
-
-    completed_tasks_queue: queue.Queue[TaskResult] = queue.Queue()
+    completed_tasks_queue: TimestampedQueue[TaskResult] = queue_from_env()
     final_task_consumer = FinalTaskConsumer(
         message_queue=message_queue,
         completed_tasks_queue=completed_tasks_queue,
+        task_results=task_results,
+    )
+
+    # one loop and one RabbitMQ connection for all background consumers
+    runtime = BackgroundRuntime()
+    runtime.add_cleanup(message_queue.close)
+    readiness = Readiness(
+        ["control_plane", "human_consumer", "final_task_consumer"]
     )
+    runtime.start()
+
+    async def register_human_service() -> None:
+        async with readiness.phase("control_plane"):
+            await human_service.register_to_control_plane(
+                control_plane_url=(
+                    f"http://{control_plane_host}:{control_plane_port}"
+                    if control_plane_port
+                    else f"http://{control_plane_host}"
+                )
+            )
 
-    async def start_consuming_finalized_tasks(
-        final_task_consumer: FinalTaskConsumer,
-    ) -> None:
-        final_task_consuming_callable = (
-            await final_task_consumer.register_to_message_queue()
+    async def consume_human_requests() -> None:
+        async with readiness.phase("human_consumer"):
+            consuming_callable = await message_queue.register_consumer(
+                human_service.as_consumer()
+            )
+        runtime.spawn(
+            human_service.processing_loop(), name="human-processing-loop"
         )
+        await consuming_callable()
 
-        await final_task_consuming_callable()
+    async def consume_final_tasks() -> None:
+        async with readiness.phase("final_task_consumer"):
+            consuming_callable = (
+                await final_task_consumer.register_to_message_queue()
+            )
+        await consuming_callable()
 
-    # server thread will remain active as long as streamlit thread is running, or is manually shutdown
-    ft_thread = threading.Thread(
-        name="Consuming thread",
-        target=asyncio.run,
-        args=(start_consuming_finalized_tasks(final_task_consumer),),
-        daemon=False,
+    # the phases are independent, so register concurrently
+    runtime.spawn(register_human_service(), name="control-plane-registration")
+    runtime.spawn(consume_human_requests(), name="human-consumer")
+    runtime.spawn(consume_final_tasks(), name="final-task-consumer")
+    try:
+        # queues are declared and bound once registered, so nothing
+        # published after this point is missed
+        elapsed = readiness.wait(timeout=STARTUP_TIMEOUT)
+    except (TimeoutError, RuntimeError):
+        # not cached by streamlit, so the next run retries from scratch
+        runtime.shutdown()
+        raise
+    atexit.register(runtime.shutdown)
+    logger.info(
+        f"Ready to interact after {elapsed:.2f}s ({readiness.summary()})."
     )
-    ft_thread.start()
-
-    time.sleep(5)
-    logger.info("Started consuming.")
 
     return (
         controller,
         completed_tasks_queue,
         final_task_consumer,
         human_input_request_queue,
-        human_input_result_queue,
+        human_input_responses,
     )
 
 
@@ -125,7 +145,7 @@ def startup() -> (
     completed_tasks_queue,
     final_task_consumer,
     human_input_request_queue,
-    human_input_result_queue,
+    human_input_responses,
 ) = startup()
 
 
@@ -136,14 +156,10 @@ st.markdown(f"_Powered by LlamaIndex_ &nbsp; {logo}", unsafe_allow_html=True)
 
 
 # state management
-if "submitted_tasks" not in st.session_state:
-    st.session_state["submitted_tasks"] = []
-if "human_required_tasks" not in st.session_state:
-    st.session_state["human_required_tasks"] = []
-if "completed_tasks" not in st.session_state:
-    st.session_state["completed_tasks"] = []
 if "tasks" not in st.session_state:
-    st.session_state["tasks"] = []
+    st.session_state["tasks"] = TaskStore()
+if "task_table" not in st.session_state:
+    st.session_state["task_table"] = TaskTable()
 if "consuming" not in st.session_state:
     st.session_state.consuming = False
 if "messages" not in st.session_state:
@@ -152,6 +168,30 @@ if "current_task" not in st.session_state:
     st.session_state.current_task = None
 if "human_input" not in st.session_state:
     st.session_state.human_input = ""
+if "seen_queue_versions" not in st.session_state:
+    st.session_state.seen_queue_versions = (0, 0)
+if "update_check_interval" not in st.session_state:
+    st.session_state.update_check_interval = UPDATE_CHECK_MIN_INTERVAL
+
+
+def _reset_update_check_interval() -> None:
+    st.session_state.update_check_interval = UPDATE_CHECK_MIN_INTERVAL
+
+
+# updates that follow user input should show up quickly
+def _handle_task_submission() -> None:
+    _reset_update_check_interval()
+    controller.handle_task_submission()
+
+
+_human_input_handler = controller.get_human_input_handler(
+    human_input_responses
+)
+
+
+def _handle_human_input() -> None:
+    _reset_update_check_interval()
+    _human_input_handler()
 
 
 left, right = st.columns([1, 2], vertical_alignment="top")
@@ -161,40 +201,19 @@ with left:
         "Task input",
         placeholder="Enter a task input.",
         key="task_input",
-        on_change=controller.handle_task_submission,
+        on_change=_handle_task_submission,
     )
 
 
-@st.experimental_fragment(run_every="5s")
+# rerun by `process_updates` when tasks change, rather than on a timer
+@st.experimental_fragment
 def task_df() -> None:
     st.text("Task Status")
     st.button("Refresh")
-    tasks = (
-        [t.input for t in st.session_state.submitted_tasks]
-        + [t.input for t in st.session_state.human_required_tasks]
-        + [t.input for t in st.session_state.completed_tasks]
-    )
-
-    task_ids = (
-        [t.task_id for t in st.session_state.submitted_tasks]
-        + [t.task_id for t in st.session_state.human_required_tasks]
-        + [t.task_id for t in st.session_state.completed_tasks]
-    )
-
-    status = (
-        ["submitted"] * len(st.session_state.submitted_tasks)
-        + ["human_required"] * len(st.session_state.human_required_tasks)
-        + ["completed"] * len(st.session_state.completed_tasks)
-    )
-
-    data = {
-        "task_id": task_ids,
-        "input": tasks,
-        "status": status,
-    }
-
-    logger.info(f"data: {data}")
-    df = pd.DataFrame(data)
+    task_table = st.session_state.task_table
+    if task_table.sync(st.session_state.tasks):
+        logger.info(f"task table updated to version {task_table.version}.")
+    df = task_table.df
     event = st.dataframe(
         df,
         hide_index=True,
@@ -215,9 +234,7 @@ def task_df() -> None:
             st.text_input(
                 "Provide human input",
                 key="human_input",
-                on_change=controller.get_human_input_handler(
-                    human_input_result_queue
-                ),
+                on_change=_handle_human_input,
             )
 
     show_task_res = (
@@ -227,93 +244,90 @@ def task_df() -> None:
 
     task_res_container = st.container(height=500)
     if show_task_res:
-        if task_res := controller.get_task_result(
+        if view := controller.get_task_result_view(
             st.session_state.current_task.task_id
         ):
-            task_type = controller.infer_task_type(task_res)
-
-            timeseries_data = None
-            value_key: str = ""
-            object_key: str = ""
-            color: str = ""
-            if task_type == "timeseries-good":
-                try:
-                    timeseries_data = perform_price_aggregation(
-                        task_res.result
-                    )
-                    value_key = "price"
-                    object_key = "good"
-                    color = "#FF91AF"
-                except json.JSONDecodeError:
-                    logger.info("Could not decode task_res")
-                    pass
-            elif task_type == "timeseries-city-stat":
-                try:
-                    timeseries_data = perform_date_value_aggregation(
-                        task_res.result
-                    )
-                    value_key = "value"
-                    object_key = "variable"
-                    color = "#73CED0"
-                except json.JSONDecodeError:
-                    logger.info("Could not decode task_res")
-                    pass
-
             with task_res_container:
-                if timeseries_data:
-                    title = timeseries_data[0][object_key]
-                    chart_data = {
-                        "dates": [el["date"] for el in timeseries_data],
-                        value_key: [el[value_key] for el in timeseries_data],
-                    }
-                    st.header(title)
+                if view.timeseries is not None:
+                    st.header(view.timeseries.label)
                     st.bar_chart(
-                        data=chart_data,
+                        data=view.chart_data,
                         x="dates",
-                        y=value_key,
+                        y=view.timeseries.value_key,
                         height=400,
-                        color=color,
+                        color=view.color,
                     )
                 else:
-                    st.write(task_res.result)
+                    st.write(view.text)
 
 
 task_df()
 
 
-@st.experimental_fragment(run_every=5)
-def process_completed_tasks(completed_queue: queue.Queue) -> None:
-    task_res: Optional[TaskResult] = None
-    try:
-        task_res = completed_queue.get_nowait()
-        logger.info("got new task result")
-    except queue.Empty:
-        logger.info("task result queue is empty.")
-
-    if task_res:
-        controller.update_associated_task_to_completed_status(
-            task_res=task_res
-        )
-
-
-process_completed_tasks(completed_queue=completed_tasks_queue)
-
-
-@st.experimental_fragment(run_every=5)
-def process_human_input_requests(
-    human_requests_queue: queue.Queue[HumanRequest],
+# the interval is read on every full run of the script, so changing it
+# takes a `st.rerun()`
+@st.experimental_fragment(run_every=st.session_state.update_check_interval)
+def process_updates(
+    completed_queue: TimestampedQueue[TaskResult],
+    human_requests_queue: TimestampedQueue[HumanRequest],
 ) -> None:
-    human_req: Optional[HumanRequest] = None
-    try:
-        human_req = human_requests_queue.get_nowait()
-        logger.info("got new human request")
-    except queue.Empty:
-        logger.info("human request queue is empty.")
-
-    if human_req:
-        controller.update_associated_task_to_human_required_status(
-            human_req=human_req
+    """Apply queued task results and human requests.
+
+    Runs every `update_check_interval` seconds but returns right away unless
+    a queue has new items; the app is rerun only when tasks changed or the
+    interval backs off.
+    """
+    seen_completed, seen_human = st.session_state.seen_queue_versions
+    active = has_updates(completed_queue, seen_completed) or has_updates(
+        human_requests_queue, seen_human
+    )
+    interval = st.session_state.update_check_interval
+    st.session_state.update_check_interval = next_check_interval(
+        interval,
+        active,
+        min_interval=UPDATE_CHECK_MIN_INTERVAL,
+        max_interval=UPDATE_CHECK_MAX_INTERVAL,
+    )
+    if not active:
+        if st.session_state.update_check_interval != interval:
+            st.rerun()
+        return
+    st.session_state.seen_queue_versions = (
+        completed_queue.version,
+        human_requests_queue.version,
+    )
+
+    # human requests first, a task may ask for input and then complete
+    if human_reqs := drain(
+        human_requests_queue,
+        max_items=DRAIN_MAX_ITEMS,
+        max_seconds=DRAIN_MAX_SECONDS,
+    ):
+        controller.update_tasks_to_human_required_status(human_reqs)
+        logger.info(
+            f"drained {len(human_reqs)} human requests: "
+            f"{human_requests_queue.metrics}"
         )
+    if task_results := drain(
+        completed_queue,
+        max_items=DRAIN_MAX_ITEMS,
+        max_seconds=DRAIN_MAX_SECONDS,
+    ):
+        controller.update_tasks_to_completed_status(task_results)
+        logger.info(
+            f"drained {len(task_results)} task results: "
+            f"{completed_queue.metrics}"
+        )
+
+    if (
+        human_reqs
+        or task_results
+        or st.session_state.update_check_interval != interval
+    ):
+        st.rerun()
 
 
-process_human_input_requests(human_requests_queue=human_input_request_queue)
+process_updates(
+    completed_queue=completed_tasks_queue,
+    human_requests_queue=human_input_request_queue,
+)
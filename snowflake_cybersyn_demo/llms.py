@@ -0,0 +1,233 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from llama_index.core.llms import LLM
+from llama_index.llms.openai import OpenAI
+
+from snowflake_cybersyn_demo.utils import load_from_env
+
+logger = logging.getLogger(__name__)
+
+_STARTED_AT = "llm_started_at"
+
+
+@dataclass
+class LLMConfig:
+    """Connection pool, timeout and retry settings for LLM API calls."""
+
+    # requests wait for a free connection, so this also caps the number of
+    # requests in flight
+    max_connections: int = 16
+    max_keepalive_connections: int = 8
+    # seconds an idle pooled connection is kept open
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+    connect_timeout: float = 5.0
+    # retried by the OpenAI client, with exponential backoff
+    max_retries: int = 3
+
+    @classmethod
+    def from_env(cls) -> "LLMConfig":
+        """Build a config from optional `LLM_*` env vars."""
+
+        def _from_env(var: str, default: Any) -> str:
+            return load_from_env(f"LLM_{var}", str(default))
+
+        default = cls()
+        return cls(
+            max_connections=int(
+                _from_env("MAX_CONNECTIONS", default.max_connections)
+            ),
+            max_keepalive_connections=int(
+                _from_env(
+                    "MAX_KEEPALIVE_CONNECTIONS",
+                    default.max_keepalive_connections,
+                )
+            ),
+            keepalive_expiry=float(
+                _from_env("KEEPALIVE_EXPIRY", default.keepalive_expiry)
+            ),
+            timeout=float(_from_env("TIMEOUT", default.timeout)),
+            connect_timeout=float(
+                _from_env("CONNECT_TIMEOUT", default.connect_timeout)
+            ),
+            max_retries=int(_from_env("MAX_RETRIES", default.max_retries)),
+        )
+
+
+@dataclass
+class ModelStats:
+    """Counters for the API requests made for one model."""
+
+    requests: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # summed over requests, in seconds
+    latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency / self.requests if self.requests else 0.0
+
+
+LLMFactory = Callable[[str, LLMConfig, httpx.Client, httpx.AsyncClient], LLM]
+
+
+def openai_factory(
+    model: str,
+    config: LLMConfig,
+    http_client: httpx.Client,
+    async_http_client: httpx.AsyncClient,
+) -> LLM:
+    llm: LLM = OpenAI(
+        model=model,
+        max_retries=config.max_retries,
+        timeout=config.timeout,
+        http_client=http_client,
+        async_http_client=async_http_client,
+    )
+    return llm
+
+
+class LLMProvider:
+    """Process-wide LLMs that share pooled, instrumented HTTP clients.
+
+    `get` builds one LLM per model with `factory` and reuses it, so API
+    calls share keep-alive connections instead of opening new ones for
+    every step. Every request made through the pooled clients is counted
+    in `stats` by the model it names, including retries.
+
+    Inject a `factory` that returns a local fake (e.g. llama_index's
+    `MockLLM`) to run workflows offline; fakes make no HTTP requests, so
+    they are not counted. The async client must only be used from one event
+    loop.
+    """
+
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        factory: LLMFactory = openai_factory,
+    ):
+        self.config = config or LLMConfig()
+        self._factory = factory
+        self._llms: Dict[str, LLM] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, ModelStats] = {}
+        self._stats_lock = threading.Lock()
+
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+        # waiting for a connection is how concurrency is limited, so wait
+        # for as long as it takes
+        timeout = httpx.Timeout(
+            self.config.timeout,
+            connect=self.config.connect_timeout,
+            pool=None,
+        )
+        self._http = httpx.Client(
+            limits=limits,
+            timeout=timeout,
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
+        )
+        self._async_http = httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            event_hooks={
+                "request": [self._aon_request],
+                "response": [self._aon_response],
+            },
+        )
+
+    @classmethod
+    def from_env(cls) -> "LLMProvider":
+        return cls(LLMConfig.from_env())
+
+    def get(self, model: str) -> LLM:
+        """The shared LLM for `model`, built on first use."""
+        with self._lock:
+            if model not in self._llms:
+                self._llms[model] = self._factory(
+                    model, self.config, self._http, self._async_http
+                )
+            return self._llms[model]
+
+    def close(self) -> None:
+        self._http.close()
+
+    async def aclose(self) -> None:
+        self._http.close()
+        await self._async_http.aclose()
+
+    def _on_request(self, request: httpx.Request) -> None:
+        request.extensions[_STARTED_AT] = time.perf_counter()
+
+    async def _aon_request(self, request: httpx.Request) -> None:
+        self._on_request(request)
+
+    def _on_response(self, response: httpx.Response) -> None:
+        if _is_json(response):
+            response.read()
+        self._record(response)
+
+    async def _aon_response(self, response: httpx.Response) -> None:
+        if _is_json(response):
+            await response.aread()
+        self._record(response)
+
+    def _record(self, response: httpx.Response) -> None:
+        request = response.request
+        latency = time.perf_counter() - request.extensions.get(
+            _STARTED_AT, time.perf_counter()
+        )
+        model = _model_of(request)
+        usage = _usage_of(response)
+        with self._stats_lock:
+            stats = self.stats.setdefault(model, ModelStats())
+            stats.requests += 1
+            stats.latency += latency
+            if response.is_error:
+                stats.errors += 1
+            stats.prompt_tokens += usage.get("prompt_tokens", 0)
+            stats.completion_tokens += usage.get("completion_tokens", 0)
+        logger.debug(
+            f"{model} request took {latency:.2f}s "
+            f"(status {response.status_code})."
+        )
+
+
+def _is_json(response: httpx.Response) -> bool:
+    # streamed completions are event streams, reading them here would
+    # consume them
+    content_type: str = response.headers.get("content-type", "")
+    return content_type.startswith("application/json")
+
+
+def _model_of(request: httpx.Request) -> str:
+    try:
+        return str(json.loads(request.content)["model"])
+    except Exception:
+        return "unknown"
+
+
+def _usage_of(response: httpx.Response) -> Dict[str, int]:
+    if not _is_json(response):
+        return {}
+    try:
+        return dict(response.json().get("usage") or {})
+    except Exception:
+        return {}
+
+
+llm_provider = LLMProvider.from_env()
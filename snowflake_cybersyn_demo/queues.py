@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import pickle
+import queue
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, List, Optional, Tuple, TypeVar
+
+from snowflake_cybersyn_demo.utils import load_from_env
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# what a bounded queue does with a put when it is full
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+
+@dataclass
+class DrainMetrics:
+    """Queue depth and drain lag, updated on every `drain`.
+
+    Lag is the time an item spent in the queue before it was drained.
+    """
+
+    depth: int = 0
+    drained: int = 0
+    dropped: int = 0
+    spilled: int = 0
+    last_batch: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+
+
+class _SpillFile:
+    """FIFO of pickled items in a SQLite file, for items that overflow."""
+
+    def __init__(self, directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(
+            prefix="queue-spill-", suffix=".db", dir=directory
+        )
+        os.close(fd)
+        # only used under the owning queue's lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE spill (id INTEGER PRIMARY KEY, item BLOB)"
+        )
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, item: Any) -> None:
+        self._conn.execute(
+            "INSERT INTO spill (item) VALUES (?)", (pickle.dumps(item),)
+        )
+        self._conn.commit()
+        self._length += 1
+
+    def popleft(self) -> Any:
+        row_id, item = self._conn.execute(
+            "SELECT id, item FROM spill ORDER BY id LIMIT 1"
+        ).fetchone()
+        self._conn.execute("DELETE FROM spill WHERE id = ?", (row_id,))
+        self._conn.commit()
+        self._length -= 1
+        return pickle.loads(item)
+
+    def close(self) -> None:
+        self._conn.close()
+        os.remove(self.path)
+
+
+class TimestampedQueue(queue.Queue[T]):
+    """`queue.Queue` that remembers when each item was put.
+
+    Items are timestamped under the queue's own lock, so the drain lag can
+    be measured without changing what producers put or consumers get.
+    `version` counts every put, so a consumer can check for new items by
+    comparing a single integer.
+
+    With a `maxsize`, `overflow` decides what a put does when the queue is
+    full: "block" waits for room (as `queue.Queue` does), "drop_oldest"
+    discards the oldest item, and "spill" keeps the overflow in a SQLite
+    file under `spill_dir` and moves it back into memory as room frees up.
+    Only "block" exerts backpressure on producers.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        overflow: str = "block",
+        spill_dir: Optional[str] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}', expected one of "
+                f"{OVERFLOW_POLICIES}."
+            )
+        self.capacity = maxsize
+        self.overflow = overflow
+        self._spill_dir = spill_dir
+        # only "block" lets `queue.Queue` enforce the bound
+        super().__init__(maxsize if overflow == "block" else 0)
+        self.metrics = DrainMetrics()
+        self.version = 0
+
+    def _init(self, maxsize: int) -> None:
+        self.queue: Deque[Tuple[float, T]] = deque()
+        self._spill: Optional[_SpillFile] = None
+
+    def _qsize(self) -> int:
+        return len(self.queue) + (len(self._spill) if self._spill else 0)
+
+    def _put(self, item: T) -> None:
+        entry = (time.monotonic(), item)
+        self.version += 1
+        full = self.capacity > 0 and len(self.queue) >= self.capacity
+        if self.overflow == "drop_oldest" and full:
+            self.queue.popleft()
+            self.metrics.dropped += 1
+        elif self.overflow == "spill" and (full or self._spill):
+            # keep FIFO order: once spilling, new items go behind the spill
+            if self._spill is None:
+                self._spill = _SpillFile(self._spill_dir)
+                logger.warning(
+                    f"Queue is full, spilling to {self._spill.path}"
+                )
+            self._spill.append(entry)
+            self.metrics.spilled += 1
+            return
+        self.queue.append(entry)
+
+    def _popleft(self) -> Tuple[float, T]:
+        entry = self.queue.popleft()
+        if self._spill is not None:
+            self.queue.append(self._spill.popleft())
+            if not self._spill:
+                self._spill.close()
+                self._spill = None
+        return entry
+
+    def _get(self) -> T:
+        return self._popleft()[1]
+
+    def get_with_lag(self) -> Tuple[T, float]:
+        """Like `get_nowait`, also returning how long the item waited."""
+        with self.mutex:
+            if not self._qsize():
+                raise queue.Empty
+            put_at, item = self._popleft()
+            self.not_full.notify()
+        return item, time.monotonic() - put_at
+
+
+async def put_async(q: TimestampedQueue[T], item: T) -> None:
+    """Put `item` from a coroutine without blocking the event loop.
+
+    For a blocking queue this waits until there is room, which delays the
+    caller (and the ack of the message being processed) while the consumer
+    is behind.
+    """
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        logger.info("Queue is full, waiting for the consumer to catch up.")
+        await asyncio.to_thread(q.put, item)
+
+
+def queue_from_env() -> TimestampedQueue:
+    """Build a queue from optional `FRONTEND_QUEUE_*` env vars."""
+    return TimestampedQueue(
+        maxsize=int(load_from_env("FRONTEND_QUEUE_MAXSIZE", "1000")),
+        overflow=load_from_env("FRONTEND_QUEUE_OVERFLOW", "block"),
+        spill_dir=load_from_env("FRONTEND_QUEUE_SPILL_DIR", "") or None,
+    )
+
+
+def has_updates(q: TimestampedQueue, seen_version: int) -> bool:
+    """Whether `q` got items after `seen_version` or was left with a backlog
+    by the last `drain`.
+    """
+    return q.version != seen_version or q.metrics.depth > 0
+
+
+def next_check_interval(
+    interval: float,
+    active: bool,
+    min_interval: float = 1.0,
+    max_interval: float = 16.0,
+) -> float:
+    """Back off while idle: double `interval` up to `max_interval`, or drop
+    back to `min_interval` once there is activity.
+    """
+    if active:
+        return min_interval
+    return min(interval * 2, max_interval)
+
+
+def drain(
+    q: TimestampedQueue[T], max_items: int = 100, max_seconds: float = 0.05
+) -> List[T]:
+    """Take up to `max_items` items without blocking, for at most
+    `max_seconds`, and update the queue's `metrics`.
+    """
+    deadline = time.monotonic() + max_seconds
+    items: List[T] = []
+    lag = 0.0
+    while len(items) < max_items and time.monotonic() < deadline:
+        try:
+            item, item_lag = q.get_with_lag()
+        except queue.Empty:
+            break
+        items.append(item)
+        lag = max(lag, item_lag)
+
+    metrics = q.metrics
+    metrics.depth = q.qsize()
+    metrics.last_batch = len(items)
+    metrics.drained += len(items)
+    if items:
+        metrics.last_lag = lag
+        metrics.max_lag = max(metrics.max_lag, lag)
+    return items
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from llama_agents.message_consumers.base import (
+    BaseMessageQueueConsumer,
+    StartConsumingCallable,
+)
+from llama_agents.message_queues.rabbitmq import (
+    DEFAULT_EXCHANGE_NAME,
+    DEFAULT_URL,
+    RabbitMQMessageQueue,
+)
+from llama_agents.messages.base import QueueMessage
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+
+class SharedRabbitMQMessageQueue(RabbitMQMessageQueue):
+    """`RabbitMQMessageQueue` that shares one connection between consumers.
+
+    The base queue opens a new connection for every consumer and for every
+    published message. Here all consumers and publishers of a process use a
+    single robust connection, each consumer on its own channel and all
+    publishes on one shared channel. The connection is bound to the event
+    loop that opened it, so the queue must only be used from one loop at a
+    time; call `close` on that loop before using it from another.
+
+    The base queue also consumes with an unlimited prefetch, so RabbitMQ
+    pushes every pending message to a consumer however far behind it is.
+    Messages are acked once the consumer has processed them, so with at
+    most `prefetch_count` unacked messages per consumer a consumer that is
+    slow to process (e.g. waiting on a full frontend queue) throttles
+    delivery.
+    """
+
+    prefetch_count: int = 10
+    _connection: Any = PrivateAttr(default=None)
+    _connection_lock: Optional[asyncio.Lock] = PrivateAttr(default=None)
+    _publish_exchange: Any = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        exchange_name: str = DEFAULT_EXCHANGE_NAME,
+        prefetch_count: int = 10,
+    ) -> None:
+        super().__init__(url=url, exchange_name=exchange_name)
+        self.prefetch_count = prefetch_count
+
+    async def shared_connection(self) -> Any:
+        """The shared connection, opened on first use."""
+        import aio_pika
+
+        if self._connection_lock is None:
+            self._connection_lock = asyncio.Lock()
+        async with self._connection_lock:
+            if self._connection is None or self._connection.is_closed:
+                # a robust connection reopens itself and its channels
+                self._connection = await aio_pika.connect_robust(self.url)
+                self._publish_exchange = None
+                logger.info("Opened shared RabbitMQ connection.")
+        return self._connection
+
+    async def _declare_exchange(self, channel: Any) -> Any:
+        from aio_pika import ExchangeType
+
+        return await channel.declare_exchange(
+            self.exchange_name, ExchangeType.DIRECT
+        )
+
+    async def _publish(self, message: QueueMessage) -> Any:
+        """Publish message to the queue."""
+        from aio_pika import DeliveryMode
+        from aio_pika import Message as AioPikaMessage
+
+        connection = await self.shared_connection()
+        if self._publish_exchange is None:
+            self._publish_exchange = await self._declare_exchange(
+                await connection.channel()
+            )
+        await self._publish_exchange.publish(
+            AioPikaMessage(
+                json.dumps(message.model_dump()).encode("utf-8"),
+                delivery_mode=DeliveryMode.PERSISTENT,
+            ),
+            routing_key=message.type,
+        )
+        logger.info(f"published message {message.id_}")
+
+    async def register_consumer(
+        self, consumer: BaseMessageQueueConsumer
+    ) -> StartConsumingCallable:
+        """Register a new consumer."""
+        from aio_pika.abc import AbstractIncomingMessage
+
+        async def _declare_queue(channel: Any) -> Any:
+            exchange = await self._declare_exchange(channel)
+            queue = await channel.declare_queue(name=consumer.message_type)
+            await queue.bind(exchange)
+            return queue
+
+        connection = await self.shared_connection()
+        async with connection.channel() as channel:
+            await _declare_queue(channel)
+        logger.info(
+            f"Registered consumer {consumer.id_}: {consumer.message_type}"
+        )
+
+        async def start_consuming_callable() -> None:
+            async def on_message(message: AbstractIncomingMessage) -> None:
+                async with message.process():
+                    queue_message = QueueMessage.model_validate(
+                        json.loads(message.body.decode("utf-8"))
+                    )
+                    await consumer.process_message(queue_message)
+
+            connection = await self.shared_connection()
+            async with connection.channel() as channel:
+                await channel.set_qos(prefetch_count=self.prefetch_count)
+                queue = await _declare_queue(channel)
+                await queue.consume(on_message)
+                await asyncio.Future()
+
+        return start_consuming_callable
+
+    async def close(self) -> None:
+        """Close the shared connection and with it every channel.
+
+        The queue can be used again afterwards, also from a new event loop,
+        e.g. to retry a startup that failed.
+        """
+        try:
+            if self._connection is not None and not self._connection.is_closed:
+                await self._connection.close()
+                logger.info("Closed shared RabbitMQ connection.")
+        finally:
+            # the lock is bound to the closing loop, and may still be held
+            # by a connect that was abandoned with it
+            self._connection = None
+            self._connection_lock = None
+            self._publish_exchange = None
@@ -0,0 +1,411 @@
+import base64
+import json
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# marks the compact binary encoding used when a series crosses processes
+_WIRE_PREFIX = "timeseries/v1:"
+_HEADER_LENGTH = struct.Struct("<I")
+
+AGGREGATIONS = ("mean", "median", "min", "max", "sum", "count")
+RESAMPLE_FREQUENCIES = ("day", "week", "month", "year")
+
+# legacy JSON records used these (label_key, value_key) pairs
+_LEGACY_KEYS = (("good", "price"), ("variable", "value"))
+
+
+@dataclass
+class TimeSeries:
+    """Columnar time series made of parallel date, label and value arrays.
+
+    `label_key` and `value_key` name the label and value columns when the
+    series is converted to records (e.g. "good"/"price" for price series and
+    "variable"/"value" for city statistics).
+    """
+
+    dates: np.ndarray
+    labels: np.ndarray
+    values: np.ndarray
+    label_key: str = "variable"
+    value_key: str = "value"
+
+    def __post_init__(self) -> None:
+        self.dates = np.asarray(self.dates, dtype="datetime64[D]")
+        self.labels = np.asarray(self.labels, dtype=object)
+        self.values = np.asarray(self.values, dtype=np.float64)
+        if not len(self.dates) == len(self.labels) == len(self.values):
+            raise ValueError("dates, labels and values must be equal length.")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __str__(self) -> str:
+        if not len(self):
+            return f"TimeSeries({self.label_key}/{self.value_key}, empty)"
+        dates = self.date_strings()
+        return (
+            f"TimeSeries({self.label_key}/{self.value_key}, "
+            f"{len(self)} points from {dates[0]} to {dates[-1]})"
+        )
+
+    @property
+    def label(self) -> str:
+        """The first label in the series, used as its title."""
+        return str(self.labels[0]) if len(self.labels) else ""
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Sequence[Any]],
+        label_key: str = "variable",
+        value_key: str = "value",
+    ) -> "TimeSeries":
+        """Build a series from `(date, label, value)` rows."""
+        rows = list(rows)
+        return cls(
+            dates=np.array([row[0] for row in rows]),
+            labels=np.array([str(row[1]) for row in rows]),
+            values=np.array([row[2] for row in rows], dtype=np.float64),
+            label_key=label_key,
+            value_key=value_key,
+        )
+
+    def date_strings(self) -> List[str]:
+        return list(np.datetime_as_string(self.dates, unit="D"))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [
+            {self.label_key: label, "date": date, self.value_key: value}
+            for label, date, value in zip(
+                self.labels.tolist(), self.date_strings(), self.values.tolist()
+            )
+        ]
+
+    def to_wire(self) -> str:
+        """Encode as a compact, text-safe binary payload."""
+        unique_labels, codes = _factorize(self.labels)
+        header = json.dumps(
+            {
+                "label_key": self.label_key,
+                "value_key": self.value_key,
+                "labels": unique_labels.tolist(),
+            }
+        ).encode()
+        payload = b"".join(
+            [
+                _HEADER_LENGTH.pack(len(header)),
+                header,
+                self.dates.astype("<i4").tobytes(),
+                codes.astype("<u4").tobytes(),
+                self.values.astype("<f8").tobytes(),
+            ]
+        )
+        return _WIRE_PREFIX + base64.b64encode(zlib.compress(payload)).decode()
+
+    @staticmethod
+    def is_wire(text: str) -> bool:
+        return text.startswith(_WIRE_PREFIX)
+
+    @classmethod
+    def from_wire(cls, text: str) -> "TimeSeries":
+        """Decode the wire encoding.
+
+        Raises `ValueError` if `text` is not a valid encoded time series.
+        """
+        if not cls.is_wire(text):
+            raise ValueError("Text is not an encoded time series.")
+        try:
+            payload = zlib.decompress(
+                base64.b64decode(text[len(_WIRE_PREFIX) :])
+            )
+        except (ValueError, zlib.error) as e:
+            raise ValueError("Could not decode time series.") from e
+
+        try:
+            (header_length,) = _HEADER_LENGTH.unpack_from(payload)
+            offset = _HEADER_LENGTH.size
+            header = json.loads(payload[offset : offset + header_length])
+            offset += header_length
+            n = (len(payload) - offset) // 16  # 4 + 4 + 8 bytes per point
+            dates = np.frombuffer(payload, dtype="<i4", count=n, offset=offset)
+            offset += 4 * n
+            codes = np.frombuffer(payload, dtype="<u4", count=n, offset=offset)
+            offset += 4 * n
+            values = np.frombuffer(
+                payload, dtype="<f8", count=n, offset=offset
+            )
+            labels = np.asarray(header["labels"], dtype=object)
+            return cls(
+                dates=dates.astype("datetime64[D]"),
+                labels=labels[codes],
+                values=values,
+                label_key=header["label_key"],
+                value_key=header["value_key"],
+            )
+        except (struct.error, KeyError, TypeError, IndexError) as e:
+            raise ValueError("Could not decode time series.") from e
+
+    @classmethod
+    def parse(cls, text: str) -> "TimeSeries":
+        """Parse either the wire encoding or legacy JSON records.
+
+        Raises `ValueError` if `text` is neither.
+        """
+        if cls.is_wire(text):
+            return cls.from_wire(text)
+
+        records = json.loads(text)
+        if (
+            not isinstance(records, list)
+            or not records
+            or not all(isinstance(el, dict) for el in records)
+        ):
+            raise ValueError("Text is not a list of time series records.")
+        for label_key, value_key in _LEGACY_KEYS:
+            if label_key in records[0]:
+                try:
+                    return cls(
+                        dates=np.array([el["date"] for el in records]),
+                        labels=np.array([el[label_key] for el in records]),
+                        values=np.array(
+                            [el[value_key] for el in records],
+                            dtype=np.float64,
+                        ),
+                        label_key=label_key,
+                        value_key=value_key,
+                    )
+                except (KeyError, TypeError) as e:
+                    raise ValueError("Invalid time series records.") from e
+        raise ValueError("Unrecognized time series records.")
+
+
+def _factorize(labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash-based equivalent of `np.unique(..., return_inverse=True)`.
+
+    Much faster than sorting for object arrays of strings; uniques are kept
+    in order of first appearance.
+    """
+    lookup: Dict[str, int] = {}
+    codes = np.fromiter(
+        (lookup.setdefault(str(label), len(lookup)) for label in labels),
+        dtype=np.int64,
+        count=len(labels),
+    )
+    return np.array(list(lookup), dtype=object), codes
+
+
+def truncate_dates(dates: np.ndarray, freq: str) -> np.ndarray:
+    """Truncate dates to the start of their day, week, month or year.
+
+    Weeks start on Monday, matching Snowflake's default `DATE_TRUNC`.
+    """
+    if freq == "day":
+        return dates
+    if freq == "week":
+        days = dates.astype(np.int64)
+        # 1970-01-01 was a Thursday, i.e. 3 days after a Monday
+        return (days - (days + 3) % 7).astype("datetime64[D]")
+    if freq == "month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    if freq == "year":
+        return dates.astype("datetime64[Y]").astype("datetime64[D]")
+    raise ValueError(
+        f"Unknown frequency '{freq}', expected one of {RESAMPLE_FREQUENCIES}."
+    )
+
+
+def aggregate(
+    timeseries: TimeSeries,
+    how: str = "mean",
+    by_label: bool = False,
+    freq: Optional[str] = None,
+) -> TimeSeries:
+    """Aggregate the values of each date with a vectorized group-by.
+
+    `how` is one of `AGGREGATIONS`. With `by_label`, each (label, date) pair
+    is its own group; otherwise all labels are combined per date and the
+    result carries the smallest label of the series, which does not depend
+    on the row order. `freq` optionally resamples the dates to one of
+    `RESAMPLE_FREQUENCIES` before grouping.
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(
+            f"Unknown aggregation '{how}', expected one of {AGGREGATIONS}."
+        )
+    if len(timeseries) == 0:
+        return timeseries
+
+    dates = timeseries.dates
+    if freq is not None:
+        dates = truncate_dates(dates, freq)
+    days = dates.astype(np.int64)
+    if by_label:
+        unique_labels, label_codes = _factorize(timeseries.labels)
+        min_day = days.min()
+        n_days = days.max() - min_day + 1
+        keys = label_codes.astype(np.int64) * n_days + (days - min_day)
+    else:
+        keys = days
+    group_keys, groups = np.unique(keys, return_inverse=True)
+    counts = np.bincount(groups)
+    values = timeseries.values
+
+    result: np.ndarray
+    if how in ("sum", "mean"):
+        result = np.bincount(groups, weights=values)
+        if how == "mean":
+            result = result / counts
+    elif how == "count":
+        result = counts.astype(np.float64)
+    else:
+        # sort by group (then by value for the median) so that every group
+        # is a contiguous run starting at `starts`
+        starts = np.cumsum(counts) - counts
+        if how == "median":
+            order = np.lexsort((values, groups))
+            sorted_values = values[order]
+            lower = sorted_values[starts + (counts - 1) // 2]
+            upper = sorted_values[starts + counts // 2]
+            result = (lower + upper) / 2
+        else:
+            order = np.argsort(groups, kind="stable")
+            if how == "min":
+                result = np.minimum.reduceat(values[order], starts)
+            else:
+                result = np.maximum.reduceat(values[order], starts)
+
+    if by_label:
+        dates = (group_keys % n_days + min_day).astype("datetime64[D]")
+        labels = unique_labels[group_keys // n_days]
+    else:
+        dates = group_keys.astype("datetime64[D]")
+        label = str(min(set(timeseries.labels.tolist())))
+        labels = np.full(len(group_keys), label, dtype=object)
+
+    return TimeSeries(
+        dates=dates,
+        labels=labels,
+        values=result,
+        label_key=timeseries.label_key,
+        value_key=timeseries.value_key,
+    )
+
+
+def aggregate_by_date(timeseries: TimeSeries, how: str = "mean") -> TimeSeries:
+    """Aggregate the values of each date, labelled with the smallest label."""
+    return aggregate(timeseries, how=how, by_label=False)
+
+
+def concatenate(series: Sequence[TimeSeries]) -> TimeSeries:
+    """Join series end to end, keeping the keys of the first one."""
+    if not series:
+        raise ValueError("Nothing to concatenate.")
+    return TimeSeries(
+        dates=np.concatenate([ts.dates for ts in series]),
+        labels=np.concatenate([ts.labels for ts in series]),
+        values=np.concatenate([ts.values for ts in series]),
+        label_key=series[0].label_key,
+        value_key=series[0].value_key,
+    )
+
+
+# partial aggregates kept per group, and how partials of two chunks combine
+_PARTIALS = {
+    "mean": ("sum", "count"),
+    "sum": ("sum",),
+    "count": ("count",),
+    "min": ("min",),
+    "max": ("max",),
+}
+_COMBINE = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+
+class StreamingAggregator:
+    """Aggregate a series that arrives in chunks.
+
+    Each chunk is reduced to per-group partials (sums, counts, minima or
+    maxima) and merged into the running partials, so memory is bounded by
+    the chunk size and the number of groups rather than by the number of
+    rows. The median is not decomposable and buffers every chunk instead.
+    Produces the same result as `aggregate` over the concatenated chunks.
+    """
+
+    def __init__(
+        self,
+        how: str = "mean",
+        by_label: bool = False,
+        freq: Optional[str] = None,
+        label_key: str = "variable",
+        value_key: str = "value",
+    ):
+        if how not in AGGREGATIONS:
+            raise ValueError(
+                f"Unknown aggregation '{how}', expected one of {AGGREGATIONS}."
+            )
+        self.how = how
+        self.by_label = by_label
+        self.freq = freq
+        self.label_key = label_key
+        self.value_key = value_key
+        self.rows = 0
+        self._partials: Dict[str, TimeSeries] = {}
+        self._buffer: List[TimeSeries] = []
+
+    def update(self, chunk: TimeSeries) -> None:
+        if len(chunk) == 0:
+            return
+        self.rows += len(chunk)
+        if self.how == "median":
+            self._buffer.append(chunk)
+            return
+
+        for partial in _PARTIALS[self.how]:
+            reduced = aggregate(
+                chunk, how=partial, by_label=self.by_label, freq=self.freq
+            )
+            if (running := self._partials.get(partial)) is not None:
+                reduced = aggregate(
+                    concatenate([running, reduced]),
+                    how=_COMBINE[partial],
+                    by_label=self.by_label,
+                )
+            self._partials[partial] = reduced
+
+    def result(self) -> TimeSeries:
+        if self.how == "median":
+            if not self._buffer:
+                return self._empty()
+            return aggregate(
+                concatenate(self._buffer),
+                how="median",
+                by_label=self.by_label,
+                freq=self.freq,
+            )
+
+        if not self._partials:
+            return self._empty()
+        if self.how == "mean":
+            sums = self._partials["sum"]
+            counts = self._partials["count"]
+            # both partials hold the same groups in the same (sorted) order
+            return TimeSeries(
+                dates=sums.dates,
+                labels=sums.labels,
+                values=sums.values / counts.values,
+                label_key=sums.label_key,
+                value_key=sums.value_key,
+            )
+        return self._partials[self.how]
+
+    def _empty(self) -> TimeSeries:
+        return TimeSeries(
+            dates=np.array([], dtype="datetime64[D]"),
+            labels=np.array([], dtype=object),
+            values=np.array([], dtype=np.float64),
+            label_key=self.label_key,
+            value_key=self.value_key,
+        )
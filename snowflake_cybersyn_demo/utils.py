@@ -1,9 +1,17 @@
 import os
+from typing import Optional
 
 
-def load_from_env(var: str) -> str:
+def load_from_env(var: str, default: Optional[str] = None) -> str:
     try:
         res = os.environ[var]
     except KeyError:
+        if default is not None:
+            return default
         raise ValueError(f"Missing env var '{var}'.")
     return res
+
+
+def load_bool_from_env(var: str, default: bool = False) -> bool:
+    """Read a flag, true when set to "1", "true" or "yes" (any case)."""
+    return load_from_env(var, str(default)).lower() in ("1", "true", "yes")
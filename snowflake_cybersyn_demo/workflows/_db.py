@@ -1,16 +1,163 @@
-import json
-from typing import Any, Dict, List
+import functools
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from snowflake.sqlalchemy import URL
-from sqlalchemy import create_engine, text
-
-from snowflake_cybersyn_demo.utils import load_from_env
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import ProgrammingError
+
+from snowflake_cybersyn_demo.cache import TTLCache
+from snowflake_cybersyn_demo.timeseries import (
+    AGGREGATIONS,
+    RESAMPLE_FREQUENCIES,
+    StreamingAggregator,
+    TimeSeries,
+)
+from snowflake_cybersyn_demo.utils import load_bool_from_env, load_from_env
+from snowflake_cybersyn_demo.workflows._engines import (
+    EnginePoolConfig,
+    EngineRegistry,
+)
+from snowflake_cybersyn_demo.workflows._executor import QueryExecutor
+from snowflake_cybersyn_demo.workflows._index import CandidateIndex
+from snowflake_cybersyn_demo.workflows._queries import (
+    PreparedQuery,
+    execute,
+    stream,
+)
+
+logger = logging.getLogger(__name__)
 
 snowflake_user = load_from_env("SNOWFLAKE_USERNAME")
 snowflake_password = load_from_env("SNOWFLAKE_PASSWORD")
 snowflake_account = load_from_env("SNOWFLAKE_ACCOUNT")
 snowflake_role = load_from_env("SNOWFLAKE_ROLE")
 
+GOVERNMENT_ESSENTIALS_DATABASE = "GOVERNMENT_ESSENTIALS"
+FINANCIAL_ECONOMIC_ESSENTIALS_DATABASE = "FINANCIAL__ECONOMIC_ESSENTIALS"
+
+
+def _create_snowflake_engine(
+    database: str, config: EnginePoolConfig
+) -> Engine:
+    url = URL(
+        account=snowflake_account,
+        user=snowflake_user,
+        password=snowflake_password,
+        database=database,
+        schema="CYBERSYN",
+        warehouse="COMPUTE_WH",
+        role=snowflake_role,
+    )
+    connect_args: Dict[str, Any] = {
+        "client_session_keep_alive": config.client_session_keep_alive
+    }
+    if config.statement_timeout:
+        connect_args["session_parameters"] = {
+            "STATEMENT_TIMEOUT_IN_SECONDS": config.statement_timeout
+        }
+    return create_engine(
+        url, connect_args=connect_args, **config.engine_kwargs()
+    )
+
+
+engine_registry = EngineRegistry(
+    engine_factory=_create_snowflake_engine,
+    config=EnginePoolConfig.from_env(),
+)
+query_executor = QueryExecutor(
+    max_workers=(
+        engine_registry.config.pool_size + engine_registry.config.max_overflow
+    ),
+    timeout=float(load_from_env("SNOWFLAKE_QUERY_TIMEOUT", "300")),
+)
+# candidate lists change at most daily, so cache them
+query_cache: TTLCache[List[str]] = TTLCache(
+    maxsize=int(load_from_env("QUERY_CACHE_MAXSIZE", "1024")),
+    ttl=float(load_from_env("QUERY_CACHE_TTL", "86400")),
+    disk_path=load_from_env("QUERY_CACHE_PATH", "") or None,
+    namespace="snowflake_cybersyn_demo.workflows._db",
+)
+
+
+def _normalize_param(value: str) -> str:
+    return " ".join(value.split())
+
+
+def _as_numbered_list(names: List[str]) -> List[str]:
+    return [f"{ix+1}. {name}" for ix, name in enumerate(names)]
+
+
+def _good_params(good: str) -> Dict[str, str]:
+    # ILIKE ignores case, so lower-casing lets equivalent lookups share
+    # Snowflake's result cache
+    return {"good_pattern": f"{_normalize_param(good).casefold()}%"}
+
+
+def _statistic_variable_params(
+    city: str, stats_variable: str
+) -> Dict[str, str]:
+    return {
+        "city": _normalize_param(city),
+        "stats_variable_pattern": (
+            f"{_normalize_param(stats_variable).casefold()}%"
+        ),
+    }
+
+
+# aggregate the time series inside Snowflake rather than on the client
+aggregation_pushdown = load_bool_from_env(
+    "SNOWFLAKE_AGGREGATION_PUSHDOWN", True
+)
+
+# rows per chunk when raw time series are streamed for client-side aggregation
+fetch_chunk_size = int(load_from_env("SNOWFLAKE_FETCH_CHUNK_SIZE", "10000"))
+
+_SQL_AGGREGATE_FUNCTIONS = {
+    "mean": "AVG",
+    "median": "MEDIAN",
+    "min": "MIN",
+    "max": "MAX",
+    "sum": "SUM",
+    "count": "COUNT",
+}
+
+
+def _aggregation_sql_parts(
+    date_column: str,
+    label_column: str,
+    how: str,
+    by_label: bool,
+    freq: Optional[str],
+) -> Dict[str, str]:
+    """SQL fragments for the `*_AGG_SQL_QUERY_TEMPLATE` templates."""
+    if how not in _SQL_AGGREGATE_FUNCTIONS:
+        raise ValueError(
+            f"Unknown aggregation '{how}', expected one of {AGGREGATIONS}."
+        )
+    if freq is not None and freq not in RESAMPLE_FREQUENCIES:
+        raise ValueError(
+            f"Unknown frequency '{freq}', "
+            f"expected one of {RESAMPLE_FREQUENCIES}."
+        )
+
+    return {
+        "date_expr": (
+            f"DATE_TRUNC('{freq}', {date_column})"
+            if freq not in (None, "day")
+            else date_column
+        ),
+        # matches `aggregate`, which labels per-date rows with the smallest
+        # label of the whole series
+        "label_expr": (
+            label_column if by_label else f"MIN(MIN({label_column})) OVER ()"
+        ),
+        "agg_fn": _SQL_AGGREGATE_FUNCTIONS[how],
+        "group_by": "1, 2" if by_label else "1",
+    }
+
+
 CANDIDATE_LIST_SQL_QUERY_TEMPLATE = """
 SELECT DISTINCT att.product,
 FROM cybersyn.bureau_of_labor_statistics_price_timeseries AS ts
@@ -18,7 +165,7 @@ JOIN cybersyn.bureau_of_labor_statistics_price_attributes AS att
     ON (ts.variable = att.variable)
 WHERE ts.date >= '2021-01-01'
   AND att.report = 'Average Price'
-  AND att.product ILIKE '{good}%';
+  AND att.product ILIKE :good_pattern;
 """
 
 
@@ -31,7 +178,7 @@ JOIN cybersyn.bureau_of_labor_statistics_price_attributes AS att
     ON (ts.variable = att.variable)
 WHERE ts.date >= '2021-01-01'
   AND att.report = 'Average Price'
-  AND att.product ILIKE '{good}%'
+  AND att.product ILIKE :good_pattern
 ORDER BY date;
 """
 
@@ -43,10 +190,40 @@ SELECT
     ts.value as value
 FROM cybersyn.datacommons_timeseries AS ts
 JOIN cybersyn.geography_index AS geo ON (ts.geo_id = geo.geo_id)
-WHERE geo.geo_name = '{city}'
+WHERE geo.geo_name = :city
+  AND geo.level IN ('City')
+  AND ts.variable_name ILIKE :stats_variable_pattern
+  AND date >= '2015-01-01'
+ORDER BY date;
+"""
+
+
+TIMESERIES_AGG_SQL_QUERY_TEMPLATE = """
+SELECT {date_expr} AS date,
+       {label_expr} AS variable_name,
+       {agg_fn}(ts.value) AS value
+FROM cybersyn.bureau_of_labor_statistics_price_timeseries AS ts
+JOIN cybersyn.bureau_of_labor_statistics_price_attributes AS att
+    ON (ts.variable = att.variable)
+WHERE ts.date >= '2021-01-01'
+  AND att.report = 'Average Price'
+  AND att.product ILIKE :good_pattern
+GROUP BY {group_by}
+ORDER BY date;
+"""
+
+
+GOVT_ESSENTIALS_AGG_SQL_QUERY_TEMPLATE = """
+SELECT {date_expr} AS date,
+       {label_expr} AS variable_name,
+       {agg_fn}(ts.value) AS value
+FROM cybersyn.datacommons_timeseries AS ts
+JOIN cybersyn.geography_index AS geo ON (ts.geo_id = geo.geo_id)
+WHERE geo.geo_name = :city
   AND geo.level IN ('City')
-  AND ts.variable_name ILIKE '{stats_variable}%'
+  AND ts.variable_name ILIKE :stats_variable_pattern
   AND date >= '2015-01-01'
+GROUP BY {group_by}
 ORDER BY date;
 """
 
@@ -56,173 +233,420 @@ SELECT DISTINCT
        ts.variable_name
 FROM cybersyn.datacommons_timeseries AS ts
 JOIN cybersyn.geography_index AS geo ON (ts.geo_id = geo.geo_id)
-WHERE geo.geo_name = '{city}'
+WHERE geo.geo_name = :city
   AND geo.level IN ('City')
   AND date >= '2015-01-01';
 """
 
 
+GOODS_SNAPSHOT_SQL_QUERY = """
+SELECT DISTINCT att.product
+FROM cybersyn.bureau_of_labor_statistics_price_timeseries AS ts
+JOIN cybersyn.bureau_of_labor_statistics_price_attributes AS att
+    ON (ts.variable = att.variable)
+WHERE ts.date >= '2021-01-01'
+  AND att.report = 'Average Price';
+"""
+
+
+CITY_VARIABLES_SNAPSHOT_SQL_QUERY = """
+SELECT DISTINCT
+       geo.geo_name,
+       ts.variable_name
+FROM cybersyn.datacommons_timeseries AS ts
+JOIN cybersyn.geography_index AS geo ON (ts.geo_id = geo.geo_id)
+WHERE geo.level IN ('City')
+  AND date >= '2015-01-01'
+"""
+
+
+CANDIDATE_LIST_QUERY = PreparedQuery(
+    "candidate_list", CANDIDATE_LIST_SQL_QUERY_TEMPLATE
+)
+TIMESERIES_QUERY = PreparedQuery("timeseries", TIMESERIES_SQL_QUERY_TEMPLATE)
+GOVT_ESSENTIALS_QUERY = PreparedQuery(
+    "govt_essentials", GOVT_ESSENTIALS_SQL_QUERY_TEMPLATE
+)
+STATISTICAL_VARIABLES_QUERY = PreparedQuery(
+    "statistical_variables", SQL_QUERY_TEMPLATE
+)
+GOODS_SNAPSHOT_QUERY = PreparedQuery(
+    "goods_snapshot", GOODS_SNAPSHOT_SQL_QUERY
+)
+CITY_VARIABLES_SNAPSHOT_QUERY = PreparedQuery(
+    "city_variables_snapshot", CITY_VARIABLES_SNAPSHOT_SQL_QUERY
+)
+SELECTED_CITY_VARIABLES_SNAPSHOT_QUERY = PreparedQuery(
+    "selected_city_variables_snapshot",
+    CITY_VARIABLES_SNAPSHOT_SQL_QUERY + "  AND geo.geo_name IN :cities",
+    expanding=("cities",),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _aggregated_query(
+    name: str,
+    template: str,
+    label_column: str,
+    how: str,
+    by_label: bool,
+    freq: Optional[str],
+) -> PreparedQuery:
+    return PreparedQuery(
+        f"{name}[{how},{by_label},{freq}]",
+        template.format(
+            **_aggregation_sql_parts(
+                "ts.date", label_column, how, by_label, freq
+            )
+        ),
+    )
+
+
+def _load_candidate_snapshot() -> Tuple[List[str], Dict[str, List[str]]]:
+    """Fetch every candidate good and the statistic variables per city."""
+    engine = engine_registry.get_engine(FINANCIAL_ECONOMIC_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        goods = [
+            str(el[0]) for el in execute(connection, GOODS_SNAPSHOT_QUERY)
+        ]
+
+    city_variables: Dict[str, List[str]] = {}
+    engine = engine_registry.get_engine(GOVERNMENT_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        if candidate_index_cities:
+            rows = execute(
+                connection,
+                SELECTED_CITY_VARIABLES_SNAPSHOT_QUERY,
+                cities=candidate_index_cities,
+            )
+        else:
+            rows = execute(connection, CITY_VARIABLES_SNAPSHOT_QUERY)
+    for city, variable in rows:
+        city_variables.setdefault(str(city), []).append(str(variable))
+
+    return goods, city_variables
+
+
+# opt-in snapshot of the candidate lists, refreshed in the background
+candidate_index_enabled = load_bool_from_env("CANDIDATE_INDEX_ENABLED", False)
+candidate_index_cities = [
+    city.strip()
+    for city in load_from_env("CANDIDATE_INDEX_CITIES", "").split(",")
+    if city.strip()
+]
+candidate_index = CandidateIndex(
+    loader=_load_candidate_snapshot,
+    refresh_interval=float(
+        load_from_env("CANDIDATE_INDEX_REFRESH_SECONDS", "86400")
+    ),
+)
+
+
 def get_list_of_statistical_variables(city: str) -> List[str]:
     """Returns a list of statistical variables that closely resemble the query.
 
     The list of statistical vars is represented as a string separated by '\n'.
     """
-    query = SQL_QUERY_TEMPLATE.format(city=city)
-    url = URL(
-        account=snowflake_account,
-        user=snowflake_user,
-        password=snowflake_password,
-        database="GOVERNMENT_ESSENTIALS",
-        schema="CYBERSYN",
-        warehouse="COMPUTE_WH",
-        role=snowflake_role,
-    )
+    # geo_name is matched exactly, so the city keeps its case
+    city = _normalize_param(city)
+    if candidate_index_enabled:
+        candidate_index.start()
+        if (names := candidate_index.lookup_city_variables(city)) is not None:
+            return _as_numbered_list(names)
+
+    cache_key = f"statistical_variables:{city}"
+    if (cached := query_cache.get(cache_key)) is not None:
+        return cached
 
-    engine = create_engine(url)
-    try:
-        connection = engine.connect()
-        results = connection.execute(text(query))
-    finally:
-        connection.close()
+    engine = engine_registry.get_engine(GOVERNMENT_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        results = execute(connection, STATISTICAL_VARIABLES_QUERY, city=city)
 
     # process
-    return [f"{ix+1}. {str(el[0])}" for ix, el in enumerate(results)]
+    stats_vars = _as_numbered_list([str(el[0]) for el in results])
+    query_cache.set(cache_key, stats_vars)
+    return stats_vars
 
 
 def get_time_series_of_statistic_variable(
     city: str, stats_variable: str
-) -> str:
+) -> TimeSeries:
     """Create a time series of a specified stats variable."""
-    query = GOVT_ESSENTIALS_SQL_QUERY_TEMPLATE.format(
-        city=city, stats_variable=stats_variable
-    )
-    url = URL(
-        account=snowflake_account,
-        user=snowflake_user,
-        password=snowflake_password,
-        database="GOVERNMENT_ESSENTIALS",
-        schema="CYBERSYN",
-        warehouse="COMPUTE_WH",
-        role=snowflake_role,
-    )
+    engine = engine_registry.get_engine(GOVERNMENT_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        rows = execute(
+            connection,
+            GOVT_ESSENTIALS_QUERY,
+            **_statistic_variable_params(city, stats_variable),
+        )
 
-    engine = create_engine(url)
-    try:
-        connection = engine.connect()
-        results = connection.execute(text(query))
-    except Exception:
-        raise
-    finally:
-        connection.close()
+    return TimeSeries.from_rows(rows, label_key="variable", value_key="value")
 
-    # process
-    results = [
-        {"variable": str(el[1]), "date": str(el[0]), "value": str(el[2])}
-        for el in results
-    ]
-    results_str = json.dumps(results, indent=4)
 
-    return results_str
+def iter_time_series_of_statistic_variable(
+    city: str, stats_variable: str, chunk_size: Optional[int] = None
+) -> Iterator[TimeSeries]:
+    """Stream the time series of a stats variable in chunks.
+
+    Chunks hold up to `chunk_size` rows (defaults to
+    `SNOWFLAKE_FETCH_CHUNK_SIZE`); the connection is held until the iterator
+    is exhausted or closed.
+    """
+    engine = engine_registry.get_engine(GOVERNMENT_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        for rows in stream(
+            connection,
+            GOVT_ESSENTIALS_QUERY,
+            chunk_size or fetch_chunk_size,
+            **_statistic_variable_params(city, stats_variable),
+        ):
+            yield TimeSeries.from_rows(
+                rows, label_key="variable", value_key="value"
+            )
 
 
 def get_list_of_candidate_goods(good: str) -> List[str]:
     """Returns a list of goods that exist in the database.
 
     The list of goods is represented as a string separated by '\n'."""
-    query = CANDIDATE_LIST_SQL_QUERY_TEMPLATE.format(good=good)
-    url = URL(
-        account=snowflake_account,
-        user=snowflake_user,
-        password=snowflake_password,
-        database="FINANCIAL__ECONOMIC_ESSENTIALS",
-        schema="CYBERSYN",
-        warehouse="COMPUTE_WH",
-        role=snowflake_role,
-    )
+    # products are matched with ILIKE, so case does not matter
+    good = _normalize_param(good)
+    if candidate_index_enabled:
+        candidate_index.start()
+        if (names := candidate_index.lookup_goods(good)) is not None:
+            return _as_numbered_list(names)
 
-    engine = create_engine(url)
-    try:
-        connection = engine.connect()
-        results = connection.execute(text(query))
-    finally:
-        connection.close()
+    cache_key = f"candidate_goods:{good.casefold()}"
+    if (cached := query_cache.get(cache_key)) is not None:
+        return cached
 
-    return [f"{ix+1}. {str(el[0])}" for ix, el in enumerate(results)]
+    engine = engine_registry.get_engine(FINANCIAL_ECONOMIC_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        results = execute(
+            connection, CANDIDATE_LIST_QUERY, **_good_params(good)
+        )
 
+    candidates = _as_numbered_list([str(el[0]) for el in results])
+    query_cache.set(cache_key, candidates)
+    return candidates
 
-def get_time_series_of_good(good: str) -> str:
+
+def get_time_series_of_good(good: str) -> TimeSeries:
     """Create a time series of the average price paid for a good nationwide starting in 2021."""
-    query = TIMESERIES_SQL_QUERY_TEMPLATE.format(good=good)
-    url = URL(
-        account=snowflake_account,
-        user=snowflake_user,
-        password=snowflake_password,
-        database="FINANCIAL__ECONOMIC_ESSENTIALS",
-        schema="CYBERSYN",
-        warehouse="COMPUTE_WH",
-        role=snowflake_role,
+    engine = engine_registry.get_engine(FINANCIAL_ECONOMIC_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        rows = execute(connection, TIMESERIES_QUERY, **_good_params(good))
+
+    return TimeSeries.from_rows(rows, label_key="good", value_key="price")
+
+
+def iter_time_series_of_good(
+    good: str, chunk_size: Optional[int] = None
+) -> Iterator[TimeSeries]:
+    """Stream the price time series of a good in chunks.
+
+    See `iter_time_series_of_statistic_variable` for `chunk_size`.
+    """
+    engine = engine_registry.get_engine(FINANCIAL_ECONOMIC_ESSENTIALS_DATABASE)
+    with engine.connect() as connection:
+        for rows in stream(
+            connection,
+            TIMESERIES_QUERY,
+            chunk_size or fetch_chunk_size,
+            **_good_params(good),
+        ):
+            yield TimeSeries.from_rows(
+                rows, label_key="good", value_key="price"
+            )
+
+
+def _aggregate_chunks(
+    chunks: Iterator[TimeSeries], aggregator: StreamingAggregator
+) -> TimeSeries:
+    for chunk in chunks:
+        aggregator.update(chunk)
+    logger.info(f"Aggregated {aggregator.rows} rows on the client.")
+    return aggregator.result()
+
+
+def get_aggregated_time_series_of_statistic_variable(
+    city: str,
+    stats_variable: str,
+    how: str = "mean",
+    by_label: bool = False,
+    freq: Optional[str] = None,
+    pushdown: Optional[bool] = None,
+) -> TimeSeries:
+    """Create an aggregated time series of a specified stats variable.
+
+    With `pushdown` (defaults to `SNOWFLAKE_AGGREGATION_PUSHDOWN`) the
+    aggregation runs in Snowflake and only the reduced series is fetched;
+    otherwise, or if the pushed-down query is rejected, the raw series is
+    streamed in chunks and aggregated incrementally on the client.
+    """
+    if pushdown is None:
+        pushdown = aggregation_pushdown
+    if pushdown:
+        query = _aggregated_query(
+            "govt_essentials_agg",
+            GOVT_ESSENTIALS_AGG_SQL_QUERY_TEMPLATE,
+            "ts.variable_name",
+            how,
+            by_label,
+            freq,
+        )
+        engine = engine_registry.get_engine(GOVERNMENT_ESSENTIALS_DATABASE)
+        try:
+            with engine.connect() as connection:
+                rows = execute(
+                    connection,
+                    query,
+                    **_statistic_variable_params(city, stats_variable),
+                )
+            return TimeSeries.from_rows(
+                rows, label_key="variable", value_key="value"
+            )
+        except ProgrammingError:
+            logger.exception(
+                "Aggregation pushdown failed, aggregating on the client."
+            )
+
+    return _aggregate_chunks(
+        iter_time_series_of_statistic_variable(city, stats_variable),
+        StreamingAggregator(
+            how=how,
+            by_label=by_label,
+            freq=freq,
+            label_key="variable",
+            value_key="value",
+        ),
     )
 
-    engine = create_engine(url)
-    try:
-        connection = engine.connect()
-        results = connection.execute(text(query))
-    finally:
-        connection.close()
 
-    # process
-    results = [
-        {"good": str(el[1]), "date": str(el[0]), "price": str(el[2])}
-        for el in results
-    ]
-    results_str = json.dumps(results, indent=4)
-
-    return results_str
-
-
-def perform_date_value_aggregation(json_str: str) -> List[Dict[str, Any]]:
-    """Perform value aggregation on the time series data."""
-    timeseries_data = json.loads(json_str)
-    variable = timeseries_data[0]["variable"]
-
-    new_time_series_data: Dict[str, List[float]] = {}
-    for el in timeseries_data:
-        date = el["date"]
-        value = el["value"]
-        if date in new_time_series_data:
-            new_time_series_data[date].append(float(value))
-        else:
-            new_time_series_data[date] = [float(value)]
+def get_aggregated_time_series_of_good(
+    good: str,
+    how: str = "mean",
+    by_label: bool = False,
+    freq: Optional[str] = None,
+    pushdown: Optional[bool] = None,
+) -> TimeSeries:
+    """Create an aggregated time series of the price paid for a good.
+
+    See `get_aggregated_time_series_of_statistic_variable` for `pushdown`.
+    """
+    if pushdown is None:
+        pushdown = aggregation_pushdown
+    if pushdown:
+        query = _aggregated_query(
+            "timeseries_agg",
+            TIMESERIES_AGG_SQL_QUERY_TEMPLATE,
+            "att.variable_name",
+            how,
+            by_label,
+            freq,
+        )
+        engine = engine_registry.get_engine(
+            FINANCIAL_ECONOMIC_ESSENTIALS_DATABASE
+        )
+        try:
+            with engine.connect() as connection:
+                rows = execute(connection, query, **_good_params(good))
+            return TimeSeries.from_rows(
+                rows, label_key="good", value_key="price"
+            )
+        except ProgrammingError:
+            logger.exception(
+                "Aggregation pushdown failed, aggregating on the client."
+            )
+
+    return _aggregate_chunks(
+        iter_time_series_of_good(good),
+        StreamingAggregator(
+            how=how,
+            by_label=by_label,
+            freq=freq,
+            label_key="good",
+            value_key="price",
+        ),
+    )
 
-    reduced_time_series_data = [
-        {
-            "variable": variable,
-            "date": date,
-            "value": sum(values) / len(values),
-        }
-        for date, values in new_time_series_data.items()
-    ]
 
-    return reduced_time_series_data
+async def aget_list_of_statistical_variables(
+    city: str, timeout: Optional[float] = None
+) -> List[str]:
+    """Async version of `get_list_of_statistical_variables`."""
+    return await query_executor.run(
+        get_list_of_statistical_variables, city, timeout=timeout
+    )
+
 
+async def aget_time_series_of_statistic_variable(
+    city: str, stats_variable: str, timeout: Optional[float] = None
+) -> TimeSeries:
+    """Async version of `get_time_series_of_statistic_variable`."""
+    return await query_executor.run(
+        get_time_series_of_statistic_variable,
+        city,
+        stats_variable,
+        timeout=timeout,
+    )
 
-def perform_price_aggregation(json_str: str) -> List[Dict[str, Any]]:
-    """Perform price aggregation on the time series data."""
-    timeseries_data = json.loads(json_str)
-    good = timeseries_data[0]["good"]
 
-    new_time_series_data: Dict[str, List[float]] = {}
-    for el in timeseries_data:
-        date = el["date"]
-        price = el["price"]
-        if date in new_time_series_data:
-            new_time_series_data[date].append(float(price))
-        else:
-            new_time_series_data[date] = [float(price)]
+async def aget_list_of_candidate_goods(
+    good: str, timeout: Optional[float] = None
+) -> List[str]:
+    """Async version of `get_list_of_candidate_goods`."""
+    return await query_executor.run(
+        get_list_of_candidate_goods, good, timeout=timeout
+    )
+
+
+async def aget_time_series_of_good(
+    good: str, timeout: Optional[float] = None
+) -> TimeSeries:
+    """Async version of `get_time_series_of_good`."""
+    return await query_executor.run(
+        get_time_series_of_good, good, timeout=timeout
+    )
 
-    reduced_time_series_data = [
-        {"good": good, "date": date, "price": sum(prices) / len(prices)}
-        for date, prices in new_time_series_data.items()
-    ]
 
-    return reduced_time_series_data
+async def aget_aggregated_time_series_of_statistic_variable(
+    city: str,
+    stats_variable: str,
+    how: str = "mean",
+    by_label: bool = False,
+    freq: Optional[str] = None,
+    pushdown: Optional[bool] = None,
+    timeout: Optional[float] = None,
+) -> TimeSeries:
+    """Async version of `get_aggregated_time_series_of_statistic_variable`."""
+    return await query_executor.run(
+        get_aggregated_time_series_of_statistic_variable,
+        city,
+        stats_variable,
+        how=how,
+        by_label=by_label,
+        freq=freq,
+        pushdown=pushdown,
+        timeout=timeout,
+    )
+
+
+async def aget_aggregated_time_series_of_good(
+    good: str,
+    how: str = "mean",
+    by_label: bool = False,
+    freq: Optional[str] = None,
+    pushdown: Optional[bool] = None,
+    timeout: Optional[float] = None,
+) -> TimeSeries:
+    """Async version of `get_aggregated_time_series_of_good`."""
+    return await query_executor.run(
+        get_aggregated_time_series_of_good,
+        good,
+        how=how,
+        by_label=by_label,
+        freq=freq,
+        pushdown=pushdown,
+        timeout=timeout,
+    )
@@ -0,0 +1,124 @@
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.engine import Engine
+
+from snowflake_cybersyn_demo.utils import load_bool_from_env, load_from_env
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EnginePoolConfig:
+    """Connection pool settings shared by every engine in a registry."""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    # seconds a pooled connection may live before it is replaced on checkout
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    client_session_keep_alive: bool = True
+    # server-side limit for a single statement, 0 disables it. Queries
+    # abandoned by a client-side timeout keep their worker and connection
+    # until this ends them, so it defaults to the query timeout
+    statement_timeout: int = 300
+
+    @classmethod
+    def from_env(cls) -> "EnginePoolConfig":
+        """Build a config from optional `SNOWFLAKE_POOL_*` env vars."""
+
+        def _from_env(var: str, default: Any) -> str:
+            return load_from_env(var, str(default)).lower()
+
+        default = cls()
+        return cls(
+            pool_size=int(_from_env("SNOWFLAKE_POOL_SIZE", default.pool_size)),
+            max_overflow=int(
+                _from_env("SNOWFLAKE_POOL_MAX_OVERFLOW", default.max_overflow)
+            ),
+            pool_timeout=float(
+                _from_env("SNOWFLAKE_POOL_TIMEOUT", default.pool_timeout)
+            ),
+            pool_recycle=int(
+                _from_env("SNOWFLAKE_POOL_RECYCLE", default.pool_recycle)
+            ),
+            pool_pre_ping=load_bool_from_env(
+                "SNOWFLAKE_POOL_PRE_PING", default.pool_pre_ping
+            ),
+            client_session_keep_alive=load_bool_from_env(
+                "SNOWFLAKE_CLIENT_SESSION_KEEP_ALIVE",
+                default.client_session_keep_alive,
+            ),
+            statement_timeout=math.ceil(
+                float(
+                    _from_env(
+                        "SNOWFLAKE_STATEMENT_TIMEOUT",
+                        _from_env(
+                            "SNOWFLAKE_QUERY_TIMEOUT",
+                            default.statement_timeout,
+                        ),
+                    )
+                )
+            ),
+        )
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments to pass to `sqlalchemy.create_engine`."""
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+
+EngineFactory = Callable[[str, EnginePoolConfig], Engine]
+
+
+class EngineRegistry:
+    """Process-wide registry of pooled engines, one per database.
+
+    Engines are created lazily on first use and then shared by every caller,
+    so connections (and the logins behind them) are reused across queries.
+    """
+
+    def __init__(
+        self,
+        engine_factory: EngineFactory,
+        config: Optional[EnginePoolConfig] = None,
+    ):
+        self._engine_factory = engine_factory
+        self._config = config or EnginePoolConfig()
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def config(self) -> EnginePoolConfig:
+        return self._config
+
+    def get_engine(self, database: str) -> Engine:
+        """Return the shared engine for `database`, creating it if needed."""
+        engine = self._engines.get(database)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            engine = self._engines.get(database)
+            if engine is None:
+                engine = self._engine_factory(database, self._config)
+                self._engines[database] = engine
+                logger.info(f"Created pooled engine for database {database}.")
+        return engine
+
+    def dispose(self) -> None:
+        """Close all pooled connections and forget the engines."""
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
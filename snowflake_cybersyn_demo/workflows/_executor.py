@@ -0,0 +1,54 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class QueryExecutor:
+    """Runs blocking query functions on a bounded thread pool.
+
+    Awaiting `run` never blocks the event loop. When the await is cancelled
+    or times out, a query that has not started yet is dropped from the pool;
+    a query already in flight is abandoned and keeps its worker until it
+    finishes or the server-side statement timeout ends it, see
+    `EnginePoolConfig.statement_timeout`.
+    """
+
+    def __init__(self, max_workers: int, timeout: Optional[float] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="query-executor"
+        )
+        self._timeout = timeout
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> T:
+        """Run `fn(*args, **kwargs)` on the pool and await its result.
+
+        `timeout` overrides the executor's default timeout (in seconds).
+        Raises `asyncio.TimeoutError` if the query does not finish in time.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(
+                future,
+                timeout=timeout if timeout is not None else self._timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Query {fn.__name__} timed out.")
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
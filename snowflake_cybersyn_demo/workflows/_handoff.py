@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, List, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ResponseRegistry(Generic[T]):
+    """Thread-safe handoff of responses to the coroutine waiting on a key.
+
+    `resolve` can be called from any thread (e.g. the Streamlit script
+    thread) and wakes the coroutine waiting on that key right away by
+    resolving its future with `loop.call_soon_threadsafe`; waiting costs
+    nothing, there is no polling. Each response goes to exactly one waiter.
+    A response that arrives while nobody waits on its key is kept for `ttl`
+    seconds for the next `wait` on that key, then dropped.
+    """
+
+    def __init__(
+        self, ttl: float = 3600, timer: Callable[[], float] = time.monotonic
+    ):
+        self._ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._waiters: Dict[
+            str, Tuple[asyncio.AbstractEventLoop, "asyncio.Future[T]"]
+        ] = {}
+        # insertion-ordered, so the oldest responses expire first
+        self._responses: "OrderedDict[str, Tuple[T, float]]" = OrderedDict()
+
+    def pending(self) -> List[str]:
+        """Keys that currently have a waiter."""
+        with self._lock:
+            return list(self._waiters)
+
+    def resolve(self, key: str, value: T) -> bool:
+        """Hand `value` to the waiter on `key`.
+
+        Returns False if nobody is waiting on `key`, in which case the value
+        is kept for a later `wait`.
+        """
+        with self._lock:
+            self._expire()
+            if (waiter := self._waiters.pop(key, None)) is not None:
+                loop, future = waiter
+                if not future.done() and not loop.is_closed():
+                    loop.call_soon_threadsafe(
+                        self._deliver, key, future, value
+                    )
+                    return True
+            self._store(key, value)
+            return False
+
+    async def wait(self, key: str) -> T:
+        """Wait for the response to `key`.
+
+        Raises `ValueError` if another coroutine is already waiting on it.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._expire()
+            if key in self._responses:
+                value, _ = self._responses.pop(key)
+                return value
+            if key in self._waiters:
+                raise ValueError(f"Already waiting for a response to {key}.")
+            future: asyncio.Future[T] = loop.create_future()
+            self._waiters[key] = (loop, future)
+        try:
+            return await future
+        finally:
+            if future.cancelled():
+                with self._lock:
+                    if self._waiters.get(key) == (loop, future):
+                        del self._waiters[key]
+
+    def _deliver(
+        self, key: str, future: "asyncio.Future[T]", value: T
+    ) -> None:
+        # runs on the waiter's loop; the waiter may have timed out since
+        if future.done():
+            with self._lock:
+                self._store(key, value)
+        else:
+            future.set_result(value)
+
+    def _store(self, key: str, value: T) -> None:
+        logger.info(f"No one is waiting for {key}, keeping its response.")
+        self._responses.pop(key, None)
+        self._responses[key] = (value, self._timer() + self._ttl)
+
+    def _expire(self) -> None:
+        now = self._timer()
+        while self._responses:
+            key, (_, expires_at) = next(iter(self._responses.items()))
+            if expires_at > now:
+                break
+            del self._responses[key]
+            logger.info(f"Dropped expired response for {key}.")
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# sorts after every other code point, used as the upper bound of a prefix
+_MAX_CHAR = "\U0010ffff"
+# seconds to wait before retrying a failed refresh
+_RETRY_INTERVAL = 60.0
+
+
+class PrefixIndex:
+    """Sorted array of names with case-insensitive binary-search lookups."""
+
+    def __init__(self, names: Iterable[str]):
+        pairs = sorted({(name.casefold(), name) for name in names})
+        self._keys = [key for key, _ in pairs]
+        self._names = [name for _, name in pairs]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, prefix: str) -> List[str]:
+        """Return every name starting with `prefix`, ignoring case."""
+        key = prefix.casefold()
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + _MAX_CHAR, lo=lo)
+        return self._names[lo:hi]
+
+
+@dataclass
+class CandidateSnapshot:
+    goods: PrefixIndex = field(default_factory=lambda: PrefixIndex([]))
+    city_variables: Dict[str, List[str]] = field(default_factory=dict)
+    loaded_at: float = 0.0
+
+
+SnapshotLoader = Callable[[], Tuple[List[str], Dict[str, List[str]]]]
+
+
+class CandidateIndex:
+    """In-memory snapshot of candidate goods and per-city statistic variables.
+
+    The snapshot is rebuilt by `loader` on a background thread every
+    `refresh_interval` seconds. Lookups return `None` when the snapshot cannot
+    answer, in which case callers should fall back to querying Snowflake.
+    """
+
+    def __init__(self, loader: SnapshotLoader, refresh_interval: float):
+        self._loader = loader
+        self._refresh_interval = refresh_interval
+        self._snapshot: Optional[CandidateSnapshot] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def lookup_goods(self, prefix: str) -> Optional[List[str]]:
+        snapshot = self._snapshot
+        # ILIKE wildcards in the prefix can't be answered by a prefix search
+        if snapshot is None or "%" in prefix or "_" in prefix:
+            return None
+        return snapshot.goods.search(prefix) or None
+
+    def lookup_city_variables(self, city: str) -> Optional[List[str]]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.city_variables.get(city)
+
+    def refresh(self) -> None:
+        """Rebuild the snapshot and swap it in atomically."""
+        start = time.perf_counter()
+        goods, city_variables = self._loader()
+        self._snapshot = CandidateSnapshot(
+            goods=PrefixIndex(goods),
+            city_variables={
+                city: sorted(variables)
+                for city, variables in city_variables.items()
+            },
+            loaded_at=time.time(),
+        )
+        logger.info(
+            f"Refreshed candidate index with {len(goods)} goods and "
+            f"{len(city_variables)} cities in "
+            f"{time.perf_counter() - start:.2f}s."
+        )
+
+    def start(self) -> None:
+        """Start the background refresh job if it isn't running already."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                name="Candidate index refresh thread",
+                target=self._refresh_loop,
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop_event.set()
+        if thread is not None:
+            thread.join()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.is_set():
+            interval = self._refresh_interval
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh candidate index.")
+                interval = min(interval, _RETRY_INTERVAL)
+            self._stop_event.wait(interval)
@@ -0,0 +1,193 @@
+import asyncio
+import functools
+import logging
+from dataclasses import dataclass, field
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from snowflake_cybersyn_demo.cache import TTLCache
+from snowflake_cybersyn_demo.timeseries import TimeSeries
+from snowflake_cybersyn_demo.utils import load_bool_from_env, load_from_env
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class PrefetchStats:
+    """Outcomes of speculative fetches.
+
+    A hit is a selection served by a prefetch, a miss one that had to be
+    fetched after the human answered. Cancelled fetches were still running
+    when another candidate was selected, unused ones had finished. Each
+    started fetch is counted as wasted at most once.
+    """
+
+    started: int = 0
+    hits: int = 0
+    misses: int = 0
+    cancelled: int = 0
+    unused: int = 0
+    failed: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def wasted(self) -> int:
+        return self.cancelled + self.unused
+
+
+@dataclass
+class Prefetched:
+    """The prefetches one run holds, to `settle` once its human answered."""
+
+    keys: List[str] = field(default_factory=list)
+    # the keys whose fetch this run started, rather than joined
+    started: Set[str] = field(default_factory=set)
+
+
+class SpeculativePrefetcher(Generic[T]):
+    """Fetches results for likely selections while a human decides.
+
+    `prefetch` starts fetches for the first `top_k` candidates on the
+    running event loop, so candidates should be ranked from the likeliest
+    selection down, and finished results are kept in a bounded cache.
+    Concurrent runs share a fetch that is already in flight, and each holds
+    it until it settles. Once the human has answered, `settle` releases the
+    candidates that were not selected and cancels the fetches no other run
+    holds, and `get` returns the selected one's result, waiting for it if it
+    is still running. A cancelled query that already started runs to
+    completion on its worker thread, see `QueryExecutor`.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        top_k: int = 3,
+        maxsize: int = 32,
+        ttl: float = 600.0,
+    ):
+        self.enabled = enabled
+        self.top_k = top_k
+        self.stats = PrefetchStats()
+        self._results: TTLCache[T] = TTLCache(maxsize, ttl)
+        self._inflight: Dict[str, "asyncio.Task[T]"] = {}
+        # number of runs holding each in-flight fetch
+        self._holders: Dict[str, int] = {}
+        # fetches released by the run that started them while other runs
+        # still held them, counted as wasted by whichever run drops them
+        self._orphaned: Set[str] = set()
+
+    def prefetch(
+        self, fetches: Dict[str, Callable[[], Awaitable[T]]]
+    ) -> Prefetched:
+        """Start or join the fetches of the first `top_k` of `fetches`.
+
+        Keys are taken in iteration order, and already cached ones are
+        skipped. Does nothing when disabled.
+        """
+        prefetched = Prefetched()
+        if not self.enabled:
+            return prefetched
+        for key in list(fetches)[: self.top_k]:
+            if key in self._inflight:
+                self._holders[key] += 1
+            elif self._results.get(key) is None:
+                task = asyncio.ensure_future(fetches[key]())
+                task.add_done_callback(functools.partial(self._on_done, key))
+                self._inflight[key] = task
+                self._holders[key] = 1
+                self._orphaned.discard(key)
+                self.stats.started += 1
+                prefetched.started.add(key)
+            else:
+                continue
+            prefetched.keys.append(key)
+        return prefetched
+
+    def _on_done(self, key: str, task: "asyncio.Task[T]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._holders.pop(key, None)
+        if task.cancelled():
+            return
+        if (exc := task.exception()) is not None:
+            self.stats.failed += 1
+            logger.warning(f"Prefetch of {key} failed: {exc!r}")
+            return
+        self._results.set(key, task.result())
+
+    def settle(self, prefetched: Prefetched, selected: str) -> None:
+        """Release the prefetches of `prefetched` other than `selected`.
+
+        A fetch is cancelled once no run holds it anymore. The selected
+        fetch stays held until it finishes, for `get`.
+        """
+        self._orphaned.discard(selected)
+        for key in prefetched.keys:
+            if key == selected:
+                continue
+            owned = key in prefetched.started or key in self._orphaned
+            task = self._inflight.get(key)
+            if task is None:
+                if owned:
+                    self._orphaned.discard(key)
+                    self.stats.unused += 1
+                continue
+            self._holders[key] -= 1
+            if self._holders[key] > 0:
+                if key in prefetched.started:
+                    self._orphaned.add(key)
+                continue
+            del self._inflight[key]
+            del self._holders[key]
+            task.cancel()
+            if owned:
+                self._orphaned.discard(key)
+                self.stats.cancelled += 1
+
+    async def get(self, key: str) -> Optional[T]:
+        """The prefetched result for `key`, or None to fetch it normally."""
+        if not self.enabled:
+            return None
+        result = self._results.get(key)
+        if result is None and (task := self._inflight.get(key)) is not None:
+            try:
+                result = await asyncio.shield(task)
+            except Exception:
+                result = None
+        if result is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        logger.info(
+            f"Prefetch {'hit' if result is not None else 'miss'} for {key} "
+            f"(hit rate {self.stats.hit_rate:.0%}, "
+            f"{self.stats.wasted} of {self.stats.started} fetches wasted)."
+        )
+        return result
+
+
+# off by default, prefetches hold query workers and warehouse time
+speculative_prefetch_enabled = load_bool_from_env(
+    "SPECULATIVE_PREFETCH_ENABLED", False
+)
+speculative_prefetcher: SpeculativePrefetcher[TimeSeries]
+speculative_prefetcher = SpeculativePrefetcher(
+    enabled=speculative_prefetch_enabled,
+    top_k=int(load_from_env("SPECULATIVE_PREFETCH_TOP_K", "3")),
+    maxsize=int(load_from_env("SPECULATIVE_PREFETCH_MAXSIZE", "32")),
+    ttl=float(load_from_env("SPECULATIVE_PREFETCH_TTL", "600")),
+)
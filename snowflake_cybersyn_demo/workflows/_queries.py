@@ -0,0 +1,142 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.sql.elements import TextClause
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop the trailing semicolon.
+
+    Snowflake's result cache only matches byte-identical query text, so every
+    execution of the same logical query should produce the same SQL.
+    """
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";").rstrip()
+
+
+@dataclass(frozen=True)
+class PreparedQuery:
+    """Canonical SQL with bound (never interpolated) parameters.
+
+    Parameters listed in `expanding` take a list of values, e.g. for `IN`.
+    """
+
+    name: str
+    sql: str
+    expanding: Tuple[str, ...] = ()
+    _text: TextClause = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        canonical_sql = canonicalize_sql(self.sql)
+        object.__setattr__(self, "sql", canonical_sql)
+        object.__setattr__(self, "_text", text(canonical_sql))
+
+    def bind(self, **params: Any) -> TextClause:
+        return self._text.bindparams(
+            *(
+                bindparam(name, value, expanding=name in self.expanding)
+                for name, value in params.items()
+            )
+        )
+
+
+@dataclass
+class QueryExecution:
+    name: str
+    query_id: Optional[str]
+    row_count: int
+    elapsed: float
+    executed_at: float
+
+
+class QueryHistory:
+    """Bounded log of recent executions and their Snowflake query IDs.
+
+    Query IDs can be looked up in Snowflake's query history to check
+    whether an execution was served from the result cache.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self._executions: Deque[QueryExecution] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, execution: QueryExecution) -> None:
+        with self._lock:
+            self._executions.append(execution)
+
+    def recent(self, n: Optional[int] = None) -> List[QueryExecution]:
+        with self._lock:
+            executions = list(self._executions)
+        return executions[-n:] if n else executions
+
+
+query_history = QueryHistory()
+
+
+def _record(
+    query: PreparedQuery, query_id: Optional[str], row_count: int, start: float
+) -> None:
+    elapsed = time.perf_counter() - start
+    query_history.record(
+        QueryExecution(
+            name=query.name,
+            query_id=query_id,
+            row_count=row_count,
+            elapsed=elapsed,
+            executed_at=time.time(),
+        )
+    )
+    logger.info(
+        f"Query {query.name} ({query_id}) returned {row_count} rows "
+        f"in {elapsed:.3f}s."
+    )
+
+
+def execute(
+    connection: Connection, query: PreparedQuery, **params: Any
+) -> List[Row]:
+    """Execute `query` with bound `params` and record its query ID."""
+    start = time.perf_counter()
+    result = connection.execute(query.bind(**params))
+    # `sfqid` is the Snowflake query ID, other drivers don't have one
+    query_id = getattr(result.cursor, "sfqid", None)
+    rows = list(result.fetchall())
+    _record(query, query_id, len(rows), start)
+    return rows
+
+
+def stream(
+    connection: Connection,
+    query: PreparedQuery,
+    chunk_size: int,
+    **params: Any,
+) -> Iterator[Sequence[Row]]:
+    """Execute `query` and yield its rows in chunks of up to `chunk_size`.
+
+    Rows are fetched with `fetchmany` as the chunks are consumed, so only one
+    chunk is held in memory at a time (the Snowflake connector downloads
+    result batches lazily as well).
+    """
+    start = time.perf_counter()
+    result = connection.execution_options(
+        stream_results=True, yield_per=chunk_size
+    ).execute(query.bind(**params))
+    query_id = getattr(result.cursor, "sfqid", None)
+    row_count = 0
+    try:
+        for partition in result.partitions(chunk_size):
+            row_count += len(partition)
+            yield partition
+    finally:
+        result.close()
+        _record(query, query_id, row_count, start)
@@ -0,0 +1,190 @@
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, List, Optional, Sequence, Set
+
+from snowflake_cybersyn_demo.utils import load_from_env
+
+logger = logging.getLogger(__name__)
+
+# "2", "#2", "no. 2", "item 2.", or a copied list line such as "2. DEF"
+_NUMBER_RE = re.compile(
+    r"^(?:#|no\.?|number|item|option)?\s*(\d+)\s*(?:[.):-]\s*(.*))?$",
+    re.IGNORECASE,
+)
+# how candidate lists number their items, e.g. "2. DEF"
+_ITEM_NUMBER_RE = re.compile(r"^\d+\.\s+")
+_TOKEN_RE = re.compile(r"\w+")
+# wrapping a reply may add quotes or a trailing full stop
+_STRIP_CHARS = " \t\n\"'`."
+
+# how each local method is trusted; fuzzy matches score themselves
+_NUMBER_CONFIDENCE = 1.0
+_EXACT_CONFIDENCE = 1.0
+_CASEFOLD_CONFIDENCE = 0.95
+_SUBSTRING_CONFIDENCE = 0.9
+# a fuzzy match this close to the runner-up is treated as ambiguous
+_AMBIGUITY_MARGIN = 0.05
+
+
+@dataclass
+class Selection:
+    """A reply mapped to one of the candidates, or to `None`."""
+
+    value: Optional[str]
+    method: str
+    confidence: float
+
+
+@dataclass
+class SelectionStats:
+    """How selections were resolved, by method."""
+
+    methods: Counter = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, method: str) -> None:
+        with self._lock:
+            self.methods[method] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.methods.values())
+
+    @property
+    def fast_path_ratio(self) -> float:
+        """Share of selections resolved without the LLM."""
+        total = self.total
+        return (total - self.methods["llm"]) / total if total else 0.0
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(_TOKEN_RE.findall(text.casefold()))
+
+
+def _similarity(reply: str, candidate: str) -> float:
+    """Best of edit-distance ratio and token overlap, between 0 and 1."""
+    ratio = SequenceMatcher(None, reply, candidate).ratio()
+    reply_tokens, candidate_tokens = _tokens(reply), _tokens(candidate)
+    if not reply_tokens or not candidate_tokens:
+        return ratio
+    overlap = len(reply_tokens & candidate_tokens) / len(
+        reply_tokens | candidate_tokens
+    )
+    return max(ratio, overlap)
+
+
+def strip_item_number(candidate: str) -> str:
+    """Drop the item number of a listed candidate, e.g. "2. DEF"."""
+    return _ITEM_NUMBER_RE.sub("", candidate, count=1)
+
+
+def resolve(reply: str, candidates: Sequence[str]) -> Selection:
+    """Map a human reply to a candidate without calling an LLM.
+
+    Tries, in order: a 1-based item number, an exact name, a name ignoring
+    case and whitespace, a unique substring, and finally the most similar
+    candidate by edit distance or token overlap.
+    """
+    text = reply.strip(_STRIP_CHARS)
+    if not text or not candidates:
+        return Selection(None, "none", 0.0)
+
+    if match := _NUMBER_RE.match(text):
+        ix, name = int(match.group(1)), match.group(2)
+        # a copied line only counts if its name agrees with its number
+        if 1 <= ix <= len(candidates) and (
+            not name
+            or _normalize(name.strip(_STRIP_CHARS))
+            == _normalize(candidates[ix - 1])
+        ):
+            return Selection(candidates[ix - 1], "number", _NUMBER_CONFIDENCE)
+
+    if text in candidates:
+        return Selection(text, "exact", _EXACT_CONFIDENCE)
+
+    key = _normalize(text)
+    normalized = [_normalize(candidate) for candidate in candidates]
+    matches = [c for c, n in zip(candidates, normalized) if n == key]
+    if len(matches) == 1:
+        return Selection(matches[0], "casefold", _CASEFOLD_CONFIDENCE)
+
+    matches = [c for c, n in zip(candidates, normalized) if key in n]
+    if len(matches) == 1:
+        return Selection(matches[0], "substring", _SUBSTRING_CONFIDENCE)
+
+    scores = sorted(
+        ((_similarity(key, n), c) for c, n in zip(candidates, normalized)),
+        reverse=True,
+    )
+    best_score, best = scores[0]
+    if len(scores) > 1 and best_score - scores[1][0] < _AMBIGUITY_MARGIN:
+        return Selection(best, "fuzzy", 0.0)
+    return Selection(best, "fuzzy", best_score)
+
+
+def rank(query: str, candidates: Sequence[str]) -> List[str]:
+    """Candidates from most to least similar to `query`.
+
+    Uses the same similarity as fuzzy matches in `resolve`. Ties, and every
+    candidate when `query` is empty, keep their order.
+    """
+    key = _normalize(query)
+    if not key:
+        return list(candidates)
+    return sorted(
+        candidates,
+        key=lambda candidate: _similarity(key, _normalize(candidate)),
+        reverse=True,
+    )
+
+
+class SelectionResolver:
+    """Resolve replies locally, falling back to an LLM when unsure.
+
+    A local `resolve` whose confidence is below `min_confidence` is handed
+    to `fallback`, usually an LLM call. `stats` counts the method used for
+    every selection, so the share of selections that skipped the LLM can
+    be monitored.
+    """
+
+    def __init__(self, min_confidence: float = 0.8):
+        self.min_confidence = min_confidence
+        self.stats = SelectionStats()
+
+    async def aresolve(
+        self,
+        reply: str,
+        candidates: Sequence[str],
+        fallback: Callable[[], Awaitable[str]],
+    ) -> str:
+        selection = resolve(reply, candidates)
+        if selection.confidence >= self.min_confidence:
+            value = str(selection.value)
+            method = selection.method
+        else:
+            value = (await fallback()).strip()
+            method = "llm"
+            # snap the LLM's answer to the exact candidate it names
+            snapped = resolve(value, candidates)
+            if snapped.confidence >= self.min_confidence:
+                value = str(snapped.value)
+        self.stats.record(method)
+        logger.info(
+            f"Resolved selection with {method} "
+            f"(fast path {self.stats.fast_path_ratio:.0%} of "
+            f"{self.stats.total})."
+        )
+        return value
+
+
+selection_resolver = SelectionResolver(
+    min_confidence=float(load_from_env("SELECTION_MIN_CONFIDENCE", "0.8"))
+)
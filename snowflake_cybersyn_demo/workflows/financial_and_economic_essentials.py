@@ -1,4 +1,5 @@
-from typing import List
+import functools
+from typing import Any, List
 
 from llama_index.core.workflow import (
     Event,
@@ -7,14 +8,21 @@ from llama_index.core.workflow import (
     Workflow,
     step,
 )
-from llama_index.llms.openai import OpenAI
 
 import snowflake_cybersyn_demo.workflows._db as db
+from snowflake_cybersyn_demo.llms import LLMProvider, llm_provider
+from snowflake_cybersyn_demo.workflows._prefetch import speculative_prefetcher
+from snowflake_cybersyn_demo.workflows._selection import (
+    rank,
+    selection_resolver,
+    strip_item_number,
+)
 from snowflake_cybersyn_demo.workflows.human_input import HumanInputWorkflow
 
 
 class CandidateLookupEvent(Event):
     candidates: List[str]
+    good: str = ""
 
 
 class HumanInputEvent(Event):
@@ -23,54 +31,80 @@ class HumanInputEvent(Event):
 
 
 class GoodsTimeSeriesWorkflow(Workflow):
+    def __init__(
+        self, llm_provider: LLMProvider = llm_provider, **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.llm_provider = llm_provider
+
     @step
     async def retrieve_candidates_from_db(
         self, ev: StartEvent
     ) -> CandidateLookupEvent:
         # Your workflow logic here
         good = str(ev.get("good", ""))
-        candidates = db.get_list_of_candidate_goods(good=good)
-        return CandidateLookupEvent(candidates=candidates)
+        candidates = await db.aget_list_of_candidate_goods(good=good)
+        return CandidateLookupEvent(candidates=candidates, good=good)
 
     @step
     async def human_input(
         self, ev: CandidateLookupEvent, human_input_workflow: Workflow
     ) -> HumanInputEvent:
+        names = [strip_item_number(c) for c in ev.candidates]
+        # fetch the goods most like the requested one while the human decides
+        prefetched = speculative_prefetcher.prefetch(
+            {
+                f"good:{name}": functools.partial(
+                    db.aget_aggregated_time_series_of_good, good=name
+                )
+                for name in rank(ev.good, names)
+            }
+        )
         candidate_list = "\n".join(ev.candidates)
         human_prompt = (
-            "List of goods that exist in the database are provided below."
+            "List of goods that exist in the database are provided below.\n\n"
             f"{candidate_list}"
             "\n\nPlease select one.:\n\n"
         )
         human_input = await human_input_workflow.run(prompt=human_prompt)
 
-        # use llm to clean up selection
-        llm = OpenAI("gpt-4o")
-        llm_prompt = (
-            "Below we provide a list of goods as well as a human's selection from this list."
-            "LIST OF GOODS:\n\n"
-            f"{candidate_list}"
-            "\n\n"
-            "HUMAN SELECTION:\n\n"
-            f"{human_input}"
-            "\n\n"
-            "Return the good that the human selected without its item number. An example is provided below:"
-            "\n\n"
-            "LIST OF GOODS:\n\n1. ABC\n2. DEF\n\nHUMAN SELECTION: 2\n\nDEF"
-        )
-        llm_response = await llm.acomplete(prompt=llm_prompt)
-        return HumanInputEvent(
-            input=human_input, selected_good=llm_response.text
+        # only ask the llm when the reply can't be matched locally
+        async def _llm_selection() -> str:
+            llm = self.llm_provider.get("gpt-4o")
+            llm_prompt = (
+                "Below we provide a list of goods as well as a human's selection from this list."
+                "LIST OF GOODS:\n\n"
+                f"{candidate_list}"
+                "\n\n"
+                "HUMAN SELECTION:\n\n"
+                f"{human_input}"
+                "\n\n"
+                "Return the good that the human selected without its item number. An example is provided below:"
+                "\n\n"
+                "LIST OF GOODS:\n\n1. ABC\n2. DEF\n\nHUMAN SELECTION: 2\n\nDEF"
+            )
+            llm_response = await llm.acomplete(prompt=llm_prompt)
+            return str(llm_response.text)
+
+        selection = await selection_resolver.aresolve(
+            human_input, names, _llm_selection
         )
+        speculative_prefetcher.settle(prefetched, f"good:{selection}")
+        return HumanInputEvent(input=human_input, selected_good=selection)
 
     @step
     async def get_time_series_data(self, ev: HumanInputEvent) -> StopEvent:
-        timeseries_data_str = db.get_time_series_of_good(good=ev.selected_good)
-        # aggregation
-        aggregated_timeseries_data = db.perform_price_aggregation(
-            timeseries_data_str
+        aggregated_timeseries_data = await speculative_prefetcher.get(
+            f"good:{ev.selected_good}"
         )
-        return StopEvent(result=aggregated_timeseries_data)
+        if aggregated_timeseries_data is None:
+            aggregated_timeseries_data = (
+                await db.aget_aggregated_time_series_of_good(
+                    good=ev.selected_good
+                )
+            )
+        # results are sent as text over the message queue
+        return StopEvent(result=aggregated_timeseries_data.to_wire())
 
 
 # Local Testing
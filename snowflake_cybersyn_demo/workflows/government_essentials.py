@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, List
 
 from llama_index.core.workflow import (
     Event,
@@ -7,9 +7,13 @@ from llama_index.core.workflow import (
     Workflow,
     step,
 )
-from llama_index.llms.openai import OpenAI
 
 import snowflake_cybersyn_demo.workflows._db as db
+from snowflake_cybersyn_demo.llms import LLMProvider, llm_provider
+from snowflake_cybersyn_demo.workflows._selection import (
+    selection_resolver,
+    strip_item_number,
+)
 from snowflake_cybersyn_demo.workflows.human_input import HumanInputWorkflow
 
 
@@ -25,13 +29,19 @@ class HumanInputEvent(Event):
 
 
 class GovtEssentialsStatisticsWorkflow(Workflow):
+    def __init__(
+        self, llm_provider: LLMProvider = llm_provider, **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.llm_provider = llm_provider
+
     @step
     async def retrieve_candidates_from_db(
         self, ev: StartEvent
     ) -> StatisticsLookupEvent:
         # Your workflow logic here
         city = str(ev.get("city", ""))
-        stats_vars = db.get_list_of_statistical_variables(city=city)
+        stats_vars = await db.aget_list_of_statistical_variables(city=city)
         return StatisticsLookupEvent(statistic_variables=stats_vars, city=city)
 
     @step
@@ -40,43 +50,50 @@ class GovtEssentialsStatisticsWorkflow(Workflow):
         ev: StatisticsLookupEvent,
         human_input_workflow: HumanInputWorkflow,
     ) -> HumanInputEvent:
+        # no variable was requested to rank by, so nothing is prefetched
+        names = [strip_item_number(c) for c in ev.statistic_variables]
         stats_vars = "\n".join(ev.statistic_variables)
         human_prompt = (
-            "List of statistic variables that exist in the database are provided below."
+            "List of statistic variables that exist in the database are provided below.\n\n"
             f"{stats_vars}"
             "\n\nPlease select one.:\n\n"
         )
         human_input = await human_input_workflow.run(prompt=human_prompt)
 
-        # use llm to clean up selection
-        llm = OpenAI("gpt-4o")
-        llm_prompt = (
-            "Below we provide a list of statistics as well as a human's selection from this list."
-            "LIST OF STATISTICS:\n\n"
-            f"{stats_vars}"
-            "\n\n"
-            "HUMAN SELECTION:\n\n"
-            f"{human_input}"
-            "\n\n"
-            "Return the statistic that the human selected without its item number. An example is provided below:"
-            "\n\n"
-            "LIST OF STATISTICS:\n\n1. ABC\n2. DEF\n\nHUMAN SELECTION: 2\n\nDEF"
+        # only ask the llm when the reply can't be matched locally
+        async def _llm_selection() -> str:
+            llm = self.llm_provider.get("gpt-4o")
+            llm_prompt = (
+                "Below we provide a list of statistics as well as a human's selection from this list."
+                "LIST OF STATISTICS:\n\n"
+                f"{stats_vars}"
+                "\n\n"
+                "HUMAN SELECTION:\n\n"
+                f"{human_input}"
+                "\n\n"
+                "Return the statistic that the human selected without its item number. An example is provided below:"
+                "\n\n"
+                "LIST OF STATISTICS:\n\n1. ABC\n2. DEF\n\nHUMAN SELECTION: 2\n\nDEF"
+            )
+            llm_response = await llm.acomplete(prompt=llm_prompt)
+            return str(llm_response.text)
+
+        selection = await selection_resolver.aresolve(
+            human_input, names, _llm_selection
         )
-        llm_response = await llm.acomplete(prompt=llm_prompt)
         return HumanInputEvent(
-            input=human_input, selected_stat=llm_response.text, city=ev.city
+            input=human_input, selected_stat=selection, city=ev.city
         )
 
     @step
     async def get_time_series_data(self, ev: HumanInputEvent) -> StopEvent:
-        timeseries_data_str = db.get_time_series_of_statistic_variable(
-            city=ev.city, stats_variable=ev.selected_stat
-        )
-        # aggregation
-        aggregated_timeseries_data = db.perform_date_value_aggregation(
-            timeseries_data_str
+        aggregated_timeseries_data = (
+            await db.aget_aggregated_time_series_of_statistic_variable(
+                city=ev.city, stats_variable=ev.selected_stat
+            )
         )
-        return StopEvent(result=aggregated_timeseries_data)
+        # results are sent as text over the message queue
+        return StopEvent(result=aggregated_timeseries_data.to_wire())
 
 
 # Local Testing
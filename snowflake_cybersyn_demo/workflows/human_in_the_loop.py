@@ -1,12 +1,17 @@
 import asyncio
 import logging
-import queue
 from typing import Any, TypedDict
 
 from llama_agents import HumanService, ServiceComponent
-from llama_agents.message_queues.rabbitmq import RabbitMQMessageQueue
 
+from snowflake_cybersyn_demo.queues import (
+    TimestampedQueue,
+    put_async,
+    queue_from_env,
+)
+from snowflake_cybersyn_demo.rabbitmq import SharedRabbitMQMessageQueue
 from snowflake_cybersyn_demo.utils import load_from_env
+from snowflake_cybersyn_demo.workflows._handoff import ResponseRegistry
 
 logger = logging.getLogger("snowflake_cybersyn_demo")
 logging.basicConfig(level=logging.INFO)
@@ -26,30 +31,21 @@ class HumanRequest(TypedDict):
 
 
 # # human in the loop function
-human_input_request_queue: queue.Queue[HumanRequest] = queue.Queue()
-human_input_result_queue: queue.Queue[str] = queue.Queue()
+human_input_request_queue: TimestampedQueue[HumanRequest] = queue_from_env()
+# answers are resolved by the frontend thread, keyed by task id, and wake
+# the waiting task directly
+human_input_responses: ResponseRegistry[str] = ResponseRegistry()
 
 
 async def human_input_fn(prompt: str, task_id: str, **kwargs: Any) -> str:
     logger.info("human input fn invoked.")
-    human_input_request_queue.put({"prompt": prompt, "task_id": task_id})
+    request: HumanRequest = {"prompt": prompt, "task_id": task_id}
+    await put_async(human_input_request_queue, request)
     logger.info("placed new prompt in queue.")
 
-    # poll until human answer is stored
-    async def _poll_for_human_input_result() -> str:
-        human_input = None
-        while human_input is None:
-            try:
-                human_input = human_input_result_queue.get_nowait()
-            except queue.Empty:
-                human_input = None
-            await asyncio.sleep(0.1)
-        logger.info("human input recieved")
-        return human_input
-
     try:
         human_input = await asyncio.wait_for(
-            _poll_for_human_input_result(),
+            human_input_responses.wait(task_id),
             timeout=6000,
         )
         logger.info(f"Recieved human input: {human_input}")
@@ -65,8 +61,9 @@ async def human_input_fn(prompt: str, task_id: str, **kwargs: Any) -> str:
 
 
 # create our multi-agent framework components
-message_queue = RabbitMQMessageQueue(
-    url=f"amqp://{message_queue_username}:{message_queue_password}@{message_queue_host}:{message_queue_port}/"
+message_queue = SharedRabbitMQMessageQueue(
+    url=f"amqp://{message_queue_username}:{message_queue_password}@{message_queue_host}:{message_queue_port}/",
+    prefetch_count=int(load_from_env("RABBITMQ_PREFETCH_COUNT", "10")),
 )
 human_service = HumanService(
     message_queue=message_queue,
@@ -0,0 +1,5 @@
+import os
+
+# the query helpers read Snowflake credentials at import time
+for var in ("USERNAME", "PASSWORD", "ACCOUNT", "ROLE"):
+    os.environ.setdefault(f"SNOWFLAKE_{var}", "unused")
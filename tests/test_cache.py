@@ -0,0 +1,48 @@
+import pathlib
+
+from snowflake_cybersyn_demo.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_disk_tier_drops_expired_entries_on_write(
+    tmp_path: pathlib.Path,
+) -> None:
+    clock = _Clock()
+    path = str(tmp_path / "cache.db")
+    cache: TTLCache[str] = TTLCache(ttl=10, disk_path=path, timer=clock)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    clock.now = 20
+    cache.set("c", "C")
+    assert cache._disk is not None
+    assert len(cache._disk) == 1
+
+
+def test_disk_tier_keeps_at_most_maxsize_entries(
+    tmp_path: pathlib.Path,
+) -> None:
+    clock = _Clock()
+    path = str(tmp_path / "cache.db")
+    cache: TTLCache[str] = TTLCache(
+        maxsize=2, ttl=100, disk_path=path, timer=clock
+    )
+    for ix, key in enumerate("abc"):
+        clock.now = ix
+        cache.set(key, key.upper())
+    assert cache._disk is not None
+    assert len(cache._disk) == 2
+
+    # a restarted cache finds only the newest entries on disk
+    restarted: TTLCache[str] = TTLCache(
+        maxsize=2, ttl=100, disk_path=path, timer=clock
+    )
+    assert restarted.get("a") is None
+    assert restarted.get("b") == "B"
+    assert restarted.get("c") == "C"
@@ -0,0 +1,86 @@
+import asyncio
+import functools
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from snowflake_cybersyn_demo.workflows._prefetch import SpeculativePrefetcher
+
+
+class _Queries:
+    """Queries that block until `finish`, recording what ran."""
+
+    def __init__(self) -> None:
+        self.started: List[str] = []
+        self.cancelled: List[str] = []
+        self._done = asyncio.Event()
+
+    async def _query(self, key: str) -> str:
+        self.started.append(key)
+        try:
+            await self._done.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(key)
+            raise
+        return key.upper()
+
+    def fetches(self, keys: str) -> Dict[str, Callable[[], Awaitable[str]]]:
+        return {key: functools.partial(self._query, key) for key in keys}
+
+    def finish(self) -> None:
+        self._done.set()
+
+
+def test_concurrent_sessions_share_prefetches() -> None:
+    prefetcher: SpeculativePrefetcher[str] = SpeculativePrefetcher(
+        enabled=True, top_k=3
+    )
+
+    async def run() -> List[Optional[str]]:
+        queries = _Queries()
+
+        async def session(selected: str, think: float) -> Optional[str]:
+            prefetched = prefetcher.prefetch(queries.fetches("abcd"))
+            await asyncio.sleep(think)
+            prefetcher.settle(prefetched, selected)
+            return await prefetcher.get(selected)
+
+        async def finish_later() -> None:
+            await asyncio.sleep(0.05)
+            # the first session left "c" to the second, which selected it
+            assert queries.cancelled == ["a"]
+            queries.finish()
+
+        results = await asyncio.gather(
+            session("b", 0.01), session("c", 0.02), finish_later()
+        )
+        # the second session joined the first one's queries
+        assert queries.started == ["a", "b", "c"]
+        return [results[0], results[1]]
+
+    assert asyncio.run(run()) == ["B", "C"]
+    assert prefetcher.stats.started == 3
+    assert prefetcher.stats.hits == 2
+    # "a" is wasted once, although both sessions held it
+    assert prefetcher.stats.cancelled == 1
+    assert prefetcher.stats.unused == 0
+
+
+def test_finished_prefetch_held_twice_is_unused_once() -> None:
+    prefetcher: SpeculativePrefetcher[str] = SpeculativePrefetcher(
+        enabled=True, top_k=2
+    )
+
+    async def run() -> None:
+        queries = _Queries()
+        queries.finish()
+        first = prefetcher.prefetch(queries.fetches("ab"))
+        second = prefetcher.prefetch(queries.fetches("ab"))
+        # both queries finish before the human answers
+        await asyncio.sleep(0.01)
+        prefetcher.settle(first, "a")
+        prefetcher.settle(second, "a")
+        assert await prefetcher.get("a") == "A"
+
+    asyncio.run(run())
+    assert prefetcher.stats.started == 2
+    assert prefetcher.stats.unused == 1
+    assert prefetcher.stats.cancelled == 0
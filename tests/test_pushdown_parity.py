@@ -0,0 +1,62 @@
+import itertools
+import pathlib
+from typing import Iterator, Optional
+
+import pytest
+
+import snowflake_cybersyn_demo.workflows._db as db
+from benchmarks.pushdown_parity import (
+    make_engine_factory,
+    populate,
+    same_series,
+)
+from snowflake_cybersyn_demo.timeseries import AGGREGATIONS
+from snowflake_cybersyn_demo.workflows._engines import EngineRegistry
+
+FETCHERS = {
+    "good": lambda **kwargs: db.get_aggregated_time_series_of_good(
+        "eggs", **kwargs
+    ),
+    "city stat": lambda **kwargs: (
+        db.get_aggregated_time_series_of_statistic_variable(
+            "New York", "count_person", **kwargs
+        )
+    ),
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def sqlite_cybersyn(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[None]:
+    """Point the query helpers at a small SQLite stand-in."""
+    tmpdir: pathlib.Path = tmp_path_factory.mktemp("cybersyn")
+    path = str(tmpdir / "cybersyn.db")
+    populate(path, 2_000)
+    registry, chunk_size = db.engine_registry, db.fetch_chunk_size
+    db.engine_registry = EngineRegistry(
+        engine_factory=make_engine_factory(path)
+    )
+    # small chunks make the client path merge partial aggregates
+    db.fetch_chunk_size = 100
+    yield
+    db.engine_registry.dispose()
+    db.engine_registry, db.fetch_chunk_size = registry, chunk_size
+
+
+@pytest.mark.parametrize(
+    "name,how,by_label,freq",
+    list(
+        itertools.product(
+            FETCHERS, AGGREGATIONS, (False, True), (None, "week", "year")
+        )
+    ),
+)
+def test_pushdown_matches_client_aggregation(
+    name: str, how: str, by_label: bool, freq: Optional[str]
+) -> None:
+    kwargs = dict(how=how, by_label=by_label, freq=freq)
+    pushed = FETCHERS[name](pushdown=True, **kwargs)
+    client = FETCHERS[name](pushdown=False, **kwargs)
+    assert len(pushed) > 0
+    assert same_series(pushed, client)
@@ -0,0 +1,12 @@
+from snowflake_cybersyn_demo.queues import next_check_interval
+
+
+def test_check_interval_backs_off_while_idle() -> None:
+    intervals = [1.0]
+    for _ in range(6):
+        intervals.append(next_check_interval(intervals[-1], active=False))
+    assert intervals == [1.0, 2.0, 4.0, 8.0, 16.0, 16.0, 16.0]
+
+
+def test_check_interval_resets_on_activity() -> None:
+    assert next_check_interval(16.0, active=True) == 1.0
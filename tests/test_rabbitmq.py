@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+aio_pika = pytest.importorskip("aio_pika")
+pytest.importorskip("llama_agents")
+
+from snowflake_cybersyn_demo.frontend.runtime import (  # noqa: E402
+    BackgroundRuntime,
+)
+from snowflake_cybersyn_demo.rabbitmq import (  # noqa: E402
+    SharedRabbitMQMessageQueue,
+)
+
+
+class _Connection:
+    is_closed = False
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+def test_startup_can_be_retried_after_a_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    attempts: List[str] = []
+    broker_up = False
+
+    async def connect_robust(url: str) -> _Connection:
+        attempts.append(url)
+        await asyncio.sleep(0.01)
+        if not broker_up:
+            raise ConnectionError("broker not up yet")
+        return _Connection()
+
+    monkeypatch.setattr(aio_pika, "connect_robust", connect_robust)
+    message_queue = SharedRabbitMQMessageQueue(url="amqp://test")
+
+    async def connect_concurrently() -> List[Any]:
+        # the callers contend for the lock, which binds it to this loop
+        results = await asyncio.gather(
+            message_queue.shared_connection(),
+            message_queue.shared_connection(),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    def start() -> List[Any]:
+        # a fresh loop per attempt, as startup() does on every rerun
+        runtime = BackgroundRuntime()
+        runtime.add_cleanup(message_queue.close)
+        runtime.start()
+        try:
+            return runtime.run(connect_concurrently(), timeout=5)
+        finally:
+            runtime.shutdown()
+
+    with pytest.raises(ConnectionError):
+        start()
+
+    broker_up = True
+    first, second = start()
+    assert first is second
+    assert first.is_closed
+    assert len(attempts) == 3
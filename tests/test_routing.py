@@ -0,0 +1,61 @@
+import asyncio
+from typing import Sequence
+
+from llama_index.core.base.base_selector import (
+    BaseSelector,
+    SelectorResult,
+    SingleSelection,
+)
+from llama_index.core.prompts.mixin import PromptDictType
+from llama_index.core.schema import QueryBundle
+from llama_index.core.tools.types import ToolMetadata
+
+from snowflake_cybersyn_demo.deployment.routing import (
+    CachedSelector,
+    PreRoutedSelector,
+    RoutingCache,
+)
+
+CHOICES = [
+    ToolMetadata(name="timeseries", description="prices of goods"),
+    ToolMetadata(name="city_stats", description="statistics of cities"),
+]
+
+
+class _FirstChoiceSelector(BaseSelector):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def _get_prompts(self) -> PromptDictType:
+        return {}
+
+    def _update_prompts(self, prompts_dict: PromptDictType) -> None:
+        pass
+
+    def _select(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> SelectorResult:
+        self.calls += 1
+        return SelectorResult(
+            selections=[SingleSelection(index=0, reason="first")]
+        )
+
+    async def _aselect(
+        self, choices: Sequence[ToolMetadata], query: QueryBundle
+    ) -> SelectorResult:
+        return self._select(choices, query)
+
+
+def test_cache_hits_are_recorded_as_their_own_path() -> None:
+    llm_selector = _FirstChoiceSelector()
+    selector = PreRoutedSelector(
+        CachedSelector(llm_selector, cache=RoutingCache()), pre_routers=[]
+    )
+
+    selector.select(CHOICES, "Price of eggs?")
+    selector.select(CHOICES, "price of eggs")
+    asyncio.run(selector.aselect(CHOICES, "PRICE OF EGGS"))
+
+    assert llm_selector.calls == 1
+    assert selector.stats["selector"].count == 1
+    assert selector.stats["routing_cache"].count == 2
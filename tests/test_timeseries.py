@@ -0,0 +1,85 @@
+import base64
+import json
+import zlib
+
+import numpy as np
+import pytest
+
+from snowflake_cybersyn_demo.timeseries import TimeSeries, aggregate_by_date
+
+
+def _series() -> TimeSeries:
+    return TimeSeries(
+        dates=np.array(["2024-01-01", "2024-01-02"]),
+        labels=np.array(["Gasoline", "Gasoline"]),
+        values=np.array([3.1, 3.2]),
+        label_key="good",
+        value_key="price",
+    )
+
+
+def test_wire_round_trip() -> None:
+    series = _series()
+    parsed = TimeSeries.parse(series.to_wire())
+    assert parsed.date_strings() == series.date_strings()
+    assert parsed.labels.tolist() == series.labels.tolist()
+    assert parsed.values.tolist() == series.values.tolist()
+    assert (parsed.label_key, parsed.value_key) == ("good", "price")
+
+
+def test_parse_legacy_records() -> None:
+    text = json.dumps(_series().to_records())
+    assert TimeSeries.parse(text).values.tolist() == [3.1, 3.2]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "A joke about gasoline prices.",
+        "[1,2]",
+        '["good"]',
+        "{}",
+        "[]",
+        '[{"good": "Gasoline", "date": "2024-01-01"}]',
+        '[{"good": "Gasoline", "price": 3.1}]',
+        '[{"good": "Gasoline", "date": "2024-01-01", "price": {}}]',
+    ],
+)
+def test_parse_invalid_text_raises_value_error(text: str) -> None:
+    with pytest.raises(ValueError):
+        TimeSeries.parse(text)
+
+
+@pytest.mark.parametrize("length", [0, 1, 10, 40])
+def test_parse_truncated_wire_raises_value_error(length: int) -> None:
+    wire = _series().to_wire()
+    prefix = "timeseries/v1:"
+    # re-encode a truncated payload so that it still decompresses
+    payload = zlib.decompress(base64.b64decode(wire[len(prefix) :]))
+    truncated = (
+        prefix + base64.b64encode(zlib.compress(payload[:length])).decode()
+    )
+    with pytest.raises(ValueError):
+        TimeSeries.parse(truncated)
+
+
+def test_parse_corrupt_wire_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        TimeSeries.parse("timeseries/v1:not base64!")
+
+
+def test_str_is_readable() -> None:
+    assert str(_series()) == (
+        "TimeSeries(good/price, 2 points from 2024-01-01 to 2024-01-02)"
+    )
+
+
+def test_aggregate_by_date_labels_with_smallest_label() -> None:
+    series = TimeSeries(
+        dates=np.array(["2024-01-01", "2024-01-01", "2024-01-02"]),
+        labels=np.array(["Eggs, grade B", "Eggs, grade A", "Eggs, grade B"]),
+        values=np.array([1.0, 2.0, 3.0]),
+    )
+    result = aggregate_by_date(series)
+    assert result.labels.tolist() == ["Eggs, grade A", "Eggs, grade A"]
+    assert result.values.tolist() == [1.5, 3.0]